@@ -0,0 +1,75 @@
+"""Measure the exact-match filtering of query results
+
+Every query is applied to a synthetic result with the current filter and
+with a simple reference implementation (one scan of all items per term).
+Both results must be equal.
+
+Usage:
+    python benchmarks/filter.py [--items 100000]
+"""
+
+import argparse
+import time
+
+from payload import generate_item
+
+from mopidy_beets.client import _filter_exact_matches
+
+# the beets web API delivers about 90 attributes per item
+PADDING_FIELDS = 70
+
+# Search terms precede field conditions (as in '_get_objects_by_attribute').
+QUERIES = {
+    "one term": [(None, "Genre 3")],
+    "one field": [("genre", "Genre 3")],
+    "two terms and a field": [(None, "late 0"), (None, "late 1"), ("genre", "Genre 3")],
+    "three common terms": [(None, f"late {n}") for n in range(3)],
+    "six common terms": [(None, f"late {n}") for n in range(6)],
+}
+
+
+def generate_padded_item(item_id):
+    item = generate_item(item_id)
+    for index in range(PADDING_FIELDS):
+        # multi-value fields are lists, most others are empty
+        item[f"field_{index}"] = [] if index % 7 == 0 else ""
+    for index in range(6):
+        item[f"late_{index}"] = f"late {index}"
+    return item
+
+
+def reference_filter(items, exact_query_list):
+    for key, value in exact_query_list:
+        if key is None:
+            items = [item for item in items if value in item.values()]
+        elif items and isinstance(items[0][key], str):
+            items = [item for item in items if item[key] == value]
+    return items
+
+
+def measure(func, items, exact_query_list):
+    started = time.perf_counter()
+    result = list(func(items, exact_query_list))
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+    items = [generate_padded_item(item_id) for item_id in range(args.items)]
+    for label, exact_query_list in QUERIES.items():
+        reference_duration, expected = measure(
+            reference_filter, items, exact_query_list
+        )
+        duration, result = measure(_filter_exact_matches, items, exact_query_list)
+        assert result == expected  # noqa: S101
+        print(
+            f"{label:>24}: {len(result):6d} matches in {duration:.3f}s "
+            f"(reference: {reference_duration:.3f}s, "
+            f"speed-up: {reference_duration / duration:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
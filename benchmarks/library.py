@@ -0,0 +1,174 @@
+"""Measure the response times of the library provider
+
+A synthetic library is imported into a temporary beets library, which is
+served by the beets web plugin (see 'BeetsLibrary' in the tests).  Common
+operations of the library provider (browse, search, lookup and get_distinct)
+are timed with empty caches ("cold") and when repeated immediately ("warm").
+The results are written as JSON, in order to compare them between releases
+(see '--baseline').
+
+Usage:
+    python benchmarks/library.py [--sizes 1000 10000 100000] [--repeat 3]
+        [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from payload import TRACKS_PER_ALBUM, generate_item
+
+# the fixtures of the tests are imported from the root of the repository
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mopidy_beets
+from mopidy_beets.actor import BeetsBackend
+from tests import MopidyBeetsTest
+from tests.helper_beets import BeetsLibrary
+
+# item attributes not accepted by beets (they are assigned by the library)
+GENERATED_ATTRIBUTES = ("id", "album_id")
+
+
+def populate(library, items):
+    with library.lib.transaction():
+        for first_id in range(0, items, TRACKS_PER_ALBUM):
+            album_items = []
+            for item_id in range(first_id, min(first_id + TRACKS_PER_ALBUM, items)):
+                values = generate_item(item_id)
+                for key in GENERATED_ATTRIBUTES:
+                    del values[key]
+                album_items.append(library.create_item(**values))
+            library.lib.add_album(album_items)
+
+
+def get_operations(library_provider, items):
+    """returns the benchmarked operations (name and function)"""
+    # pick the values in the middle of the library
+    item = generate_item(items // 2)
+    artist = item["albumartist"]
+    album_uri = library_provider.browse(f"beets:library:albums-by-artist;{artist}")[
+        0
+    ].uri
+    track_uri = library_provider.browse(album_uri)[0].uri
+    operations = {
+        "browse:root": lambda: library_provider.browse("beets:library"),
+        "browse:artist": lambda: library_provider.browse(
+            f"beets:library:albums-by-artist;{artist}"
+        ),
+        "browse:genre": lambda: library_provider.browse(
+            f"beets:library:albums-by-genre;{item['genre']}"
+        ),
+        "browse:year": lambda: library_provider.browse(
+            f"beets:library:albums-by-year;{item['year']}"
+        ),
+        "browse:album": lambda: library_provider.browse(album_uri),
+        "search:exact": lambda: library_provider.search(
+            {"artist": [artist], "track_name": [item["title"]]}, exact=True
+        ),
+        "search:non-exact": lambda: library_provider.search(
+            {"any": [item["composer"]]}
+        ),
+        "lookup:artist": lambda: library_provider.lookup(
+            f"beets:library:artist;{artist}"
+        ),
+        "lookup:album": lambda: library_provider.lookup(album_uri),
+        "lookup:track": lambda: library_provider.lookup(track_uri),
+    }
+    for category in ("albums-by-artist", "albums-by-genre", "albums-by-year"):
+        operations[f"browse:{category}"] = lambda uri=f"beets:library:{category}": (
+            library_provider.browse(uri)
+        )
+    for field in ("artist", "albumartist", "album", "composer", "genre"):
+        operations[f"get_distinct:{field}"] = lambda field=field: (
+            library_provider.get_distinct(field)
+        )
+    return operations
+
+
+def measure(function, repeat, clear_caches):
+    """returns the median durations (in milliseconds) with cold and warm caches"""
+    cold, warm = [], []
+    for _ in range(repeat):
+        clear_caches()
+        started = time.perf_counter()
+        function()
+        cold.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        function()
+        warm.append(time.perf_counter() - started)
+    return {
+        "cold": round(statistics.median(cold) * 1000, 3),
+        "warm": round(statistics.median(warm) * 1000, 3),
+    }
+
+
+def run(items, repeat):
+    for name in ("beets", "werkzeug"):
+        logging.getLogger(name).disabled = True
+    library = BeetsLibrary()
+    populate(library, items)
+    config = MopidyBeetsTest.get_config()
+    config["beets"]["hostname"], config["beets"]["port"] = library.get_connection_pair()
+    backend = BeetsBackend(config=config, audio=None)
+    library.start()
+    try:
+        operations = get_operations(backend.library, items)
+        return {
+            name: measure(function, repeat, backend.beets_api.caches.clear)
+            for name, function in operations.items()
+        }
+    finally:
+        backend.on_stop()
+        library.stop()
+        library.teardown_beets()
+
+
+def compare(report, baseline):
+    """print the operations, which became slower or faster than before"""
+    for items, results in report["results"].items():
+        for name, durations in results.items():
+            previous = baseline["results"].get(items, {}).get(name)
+            if previous is None:
+                continue
+            for caches, duration in durations.items():
+                if previous[caches]:
+                    ratio = duration / previous[caches]
+                    print(
+                        f"{items} items {name} ({caches}): {ratio:.2f}x",
+                        file=sys.stderr,
+                    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="JSON file (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="JSON file of a previous run")
+    args = parser.parse_args()
+    report = {
+        "version": mopidy_beets.__version__,
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": {},
+    }
+    for items in args.sizes:
+        print(f"benchmarking a library of {items} items ...", file=sys.stderr)
+        report["results"][str(items)] = run(items, args.repeat)
+    if args.baseline is not None:
+        compare(report, json.loads(args.baseline.read_text()))
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure the memory consumed by parsed tracks
+
+The tracks of a synthetic library are parsed query by query (as if the
+library was browsed album by album) and all results are kept (as if they
+were cached).  The memory allocated for these tracks is reported with and
+without sharing equal artists and albums between the tracks.
+
+Usage:
+    python benchmarks/memory.py [--items 100000] [--query-size 1000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from payload import generate_album, generate_item
+
+from mopidy_beets.client import BeetsRemoteClient
+
+
+class SyntheticClient(BeetsRemoteClient):
+    """deliver synthetic datasets instead of sending requests"""
+
+    def get_datasets_by_ids(self, base_path, root_key, ids):  # noqa: ARG002
+        generate = generate_album if base_path == "/album" else generate_item
+        return [generate(dataset_id) for dataset_id in ids]
+
+
+class ForgetfulDict(dict):
+    """never remember anything (disables the sharing of parsed objects)"""
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def measure(items, query_size, *, sharing):
+    client = SyntheticClient("http://localhost:0", {})
+    if not sharing:
+        client.known_artists = ForgetfulDict()
+        client.known_albums = ForgetfulDict()
+    gc.collect()
+    tracemalloc.start()
+    results = []
+    for offset in range(0, items, query_size):
+        datasets = [
+            generate_item(item_id)
+            for item_id in range(offset, min(offset + query_size, items))
+        ]
+        results.append(client._parse_multiple_tracks(datasets))  # noqa: SLF001
+    # discard everything except for the parsed tracks
+    client.caches.clear()
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert sum(len(tracks) for tracks in results) == items  # noqa: S101
+    return allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--query-size", type=int, default=1000)
+    args = parser.parse_args()
+    for sharing in (False, True):
+        allocated = measure(args.items, args.query_size, sharing=sharing)
+        label = "shared" if sharing else "separate"
+        print(
+            f"{args.items} tracks with {label} artists/albums: "
+            f"{allocated / 2**20:.1f} MiB ({allocated / args.items:.0f} bytes/track)"
+        )
+
+
+if __name__ == "__main__":
+    main()
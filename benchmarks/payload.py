@@ -0,0 +1,50 @@
+"""Synthetic datasets similar to the responses of the beets web API"""
+
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 8
+
+
+def generate_album(album_id):
+    artist_index = album_id // ALBUMS_PER_ARTIST
+    return {
+        "id": album_id,
+        "album": f"Album {album_id}",
+        "albumartist": f"Artist {artist_index}",
+        "albumartist_sort": f"Artist {artist_index:06d}",
+        "mb_albumartistid": f"00000000-0000-0000-0000-{artist_index:012d}",
+        "mb_albumid": f"00000000-0000-0000-0001-{album_id:012d}",
+        "tracktotal": TRACKS_PER_ALBUM,
+        "disctotal": 1,
+        "year": 1960 + album_id % 60,
+        "month": 1 + album_id % 12,
+        "day": 1 + album_id % 28,
+        "genre": f"Genre {album_id % 20}",
+    }
+
+
+def generate_item(item_id):
+    album = generate_album(item_id // TRACKS_PER_ALBUM + 1)
+    return {
+        "id": item_id,
+        "title": f"Title {item_id}",
+        "artist": album["albumartist"],
+        "artist_sort": album["albumartist_sort"],
+        "mb_artistid": album["mb_albumartistid"],
+        "albumartist": album["albumartist"],
+        "albumartist_sort": album["albumartist_sort"],
+        "mb_albumartistid": album["mb_albumartistid"],
+        "composer": f"Composer {item_id % 500}",
+        "album": album["album"],
+        "album_id": album["id"],
+        "genre": album["genre"],
+        "track": 1 + item_id % TRACKS_PER_ALBUM,
+        "disc": 1,
+        "year": album["year"],
+        "month": album["month"],
+        "day": album["day"],
+        "length": 180.5 + item_id % 120,
+        "bitrate": 320000,
+        "comments": "",
+        "mb_trackid": f"00000000-0000-0000-0002-{item_id:012d}",
+        "mtime": 1700000000.0 + item_id,
+    }
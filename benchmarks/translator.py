@@ -0,0 +1,47 @@
+"""Measure the throughput of parsing track datasets
+
+A synthetic payload (similar to the results of the beets web API) is parsed
+by the client, as it would be for a large query.  The albums are prefetched
+into the cache, thus no requests are sent.
+
+Usage:
+    python benchmarks/translator.py [--items 50000] [--repeat 3]
+"""
+
+import argparse
+import time
+
+from payload import generate_album, generate_item
+
+from mopidy_beets.client import BeetsRemoteClient
+from mopidy_beets.translator import parse_album
+
+
+def get_prepared_client(datasets):
+    client = BeetsRemoteClient("http://localhost:0", {}, cache_size=len(datasets))
+    album_cache = client.caches.get_cache("get_album")
+    for album_id in {dataset["album_id"] for dataset in datasets}:
+        album_cache.put((album_id,), parse_album(generate_album(album_id), client))
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    datasets = [generate_item(item_id) for item_id in range(args.items)]
+    durations = []
+    for _ in range(args.repeat):
+        # every run starts with an empty cache of tracks (albums are cached)
+        client = get_prepared_client(datasets)
+        started = time.perf_counter()
+        tracks = client._parse_multiple_tracks(datasets)  # noqa: SLF001
+        durations.append(time.perf_counter() - started)
+        assert len(tracks) == args.items  # noqa: S101
+    best = min(durations)
+    print(f"parsed {args.items} tracks in {best:.3f}s: {args.items / best:.0f} items/s")
+
+
+if __name__ == "__main__":
+    main()
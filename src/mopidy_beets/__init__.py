@@ -18,6 +18,35 @@ class Extension(ext.Extension):
         schema = super().get_config_schema()
         schema["hostname"] = config.Hostname()
         schema["port"] = config.Port()
+        schema["connect_timeout"] = config.Float(minimum=0.1)
+        schema["read_timeout"] = config.Float(minimum=0.1)
+        schema["connection_pool_size"] = config.Integer(minimum=1)
+        schema["request_retries"] = config.Integer(minimum=0)
+        schema["retry_backoff"] = config.Float(minimum=0)
+        schema["compression"] = config.Boolean()
+        schema["cache_size"] = config.Integer(minimum=1)
+        schema["cache_ttl"] = config.Integer(minimum=0)
+        schema["stale_while_revalidate"] = config.Boolean()
+        schema["circuit_breaker_threshold"] = config.Integer(minimum=0)
+        schema["circuit_breaker_timeout"] = config.Integer(minimum=1)
+        schema["lookup_chunk_size"] = config.Integer(minimum=1)
+        schema["max_concurrent_requests"] = config.Integer(minimum=1)
+        schema["stream_responses"] = config.Boolean()
+        schema["metrics_interval"] = config.Integer(minimum=0)
+        schema["metrics_file"] = config.Path(optional=True)
+        schema["search_limit"] = config.Integer(minimum=0)
+        schema["warmup"] = config.Boolean()
+        schema["browse_prefetch"] = config.Integer(minimum=0)
+        schema["prefetch_workers"] = config.Integer(minimum=1)
+        schema["library_db"] = config.Path(optional=True)
+        schema["local_playback"] = config.Boolean()
+        schema["beets_music_directory"] = config.String(optional=True)
+        schema["local_music_directory"] = config.Path(optional=True)
+        schema["audio_cache_size"] = config.Integer(minimum=0)
+        schema["audio_cache_read_ahead"] = config.Integer(minimum=0)
+        schema["audio_cache_eviction"] = config.String(choices=["lru", "fifo"])
+        schema["mirror"] = config.Boolean()
+        schema["mirror_refresh_interval"] = config.Integer(minimum=1)
         return schema
 
     def setup(self, registry):
@@ -5,14 +5,23 @@ import pykka
 from mopidy import backend
 from mopidy.types import UriScheme
 
+from . import Extension
+from .audio_cache import AudioCache
 from .client import BeetsRemoteClient
+from .database import BeetsDatabaseClient
 from .library import BeetsLibraryProvider
+from .mirror import BeetsMirrorClient
+from .playback import LocalFileMapper
+from .translator import parse_uri
 
 logger = logging.getLogger(__name__)
 
 
 class BeetsBackend(pykka.ThreadingActor, backend.Backend):
     uri_schemes: ClassVar[list[UriScheme]] = [UriScheme("beets")]
+    # the providers are always set (unlike the optional ones of the base class)
+    library: BeetsLibraryProvider
+    playback: "BeetsPlaybackProvider"
 
     def __init__(self, config, audio):
         super().__init__()
@@ -21,16 +30,133 @@ class BeetsBackend(pykka.ThreadingActor, backend.Backend):
             f"http://{config['beets']['hostname']}:{config['beets']['port']}"
         )
 
-        self.beets_api = BeetsRemoteClient(beets_endpoint, config["proxy"])
-        self.library = BeetsLibraryProvider(backend=self)
-        self.playback = BeetsPlaybackProvider(audio=audio, backend=self)
+        client_kwargs = {
+            "connect_timeout": config["beets"]["connect_timeout"],
+            "read_timeout": config["beets"]["read_timeout"],
+            "pool_size": config["beets"]["connection_pool_size"],
+            "max_retries": config["beets"]["request_retries"],
+            "retry_backoff": config["beets"]["retry_backoff"],
+            "compression": config["beets"]["compression"],
+            "cache_size": config["beets"]["cache_size"],
+            "cache_ttl": config["beets"]["cache_ttl"],
+            "stale_while_revalidate": config["beets"]["stale_while_revalidate"],
+            "circuit_breaker_threshold": config["beets"]["circuit_breaker_threshold"],
+            "circuit_breaker_timeout": config["beets"]["circuit_breaker_timeout"],
+            "id_chunk_size": config["beets"]["lookup_chunk_size"],
+            "max_concurrent_requests": config["beets"]["max_concurrent_requests"],
+            "stream_responses": config["beets"]["stream_responses"],
+            "metrics_interval": config["beets"]["metrics_interval"],
+            "metrics_file": config["beets"]["metrics_file"],
+        }
+        if config["beets"]["library_db"]:
+            self.beets_api = BeetsDatabaseClient(
+                config["beets"]["library_db"],
+                beets_endpoint,
+                config["proxy"],
+                **client_kwargs,
+            )
+        elif config["beets"]["mirror"]:
+            mirror_path = Extension.get_data_dir(config) / "library.sqlite3"
+            self.beets_api = BeetsMirrorClient(
+                mirror_path,
+                beets_endpoint,
+                config["proxy"],
+                refresh_interval=config["beets"]["mirror_refresh_interval"],
+                **client_kwargs,
+            )
+        else:
+            self.beets_api = BeetsRemoteClient(
+                beets_endpoint, config["proxy"], **client_kwargs
+            )
+        self.library = BeetsLibraryProvider(  # pyright: ignore[reportIncompatibleVariableOverride]
+            backend=self,
+            search_limit=config["beets"]["search_limit"],
+            browse_prefetch=config["beets"]["browse_prefetch"],
+            prefetch_workers=config["beets"]["prefetch_workers"],
+        )
+        self._warmup = config["beets"]["warmup"]
+        # the warm-up leaves room in the caches for the results of other calls
+        self._warmup_limit = max(1, config["beets"]["cache_size"] // 2)
+        self.playback = BeetsPlaybackProvider(  # pyright: ignore[reportIncompatibleVariableOverride]
+            audio=audio, backend=self
+        )
+        if config["beets"]["local_playback"]:
+            try:
+                self.playback.file_mapper = LocalFileMapper(
+                    config["beets"]["beets_music_directory"],
+                    config["beets"]["local_music_directory"],
+                )
+            except ValueError as exc:
+                # the files are streamed instead
+                logger.error(f"Beets - Local playback is disabled: {exc}")  # noqa: TRY400
+        if config["beets"]["audio_cache_size"]:
+            self.playback.audio_cache = AudioCache(
+                Extension.get_cache_dir(config) / "audio",
+                config["beets"]["audio_cache_size"] * 1024 * 1024,
+                self.beets_api.download_track,
+                self.playback.get_following_tracks,
+                read_ahead=config["beets"]["audio_cache_read_ahead"],
+                eviction_policy=config["beets"]["audio_cache_eviction"],
+            )
         self.playlists = None
 
+    def on_start(self):
+        self.beets_api.start()
+        if self._warmup:
+            # fill the caches in the background (without blocking the actor)
+            self.library.prefetcher.warm_up(
+                self.library.root_directory.uri, max_uris=self._warmup_limit
+            )
+
+    def on_stop(self):
+        self.library.prefetcher.stop()
+        if self.playback.audio_cache is not None:
+            self.playback.audio_cache.stop()
+        self.beets_api.stop()
+
 
 class BeetsPlaybackProvider(backend.PlaybackProvider):
     backend: BeetsBackend
+    # play local files instead of streaming via the beets web API (optional)
+    file_mapper: LocalFileMapper | None = None
+    # download upcoming tracks in advance (optional)
+    audio_cache: AudioCache | None = None
 
     def translate_uri(self, uri):
         track_id = uri.split(";")[1]
         logger.debug(f"Getting info for track {uri} with id {track_id}")
+        if self.file_mapper is not None:
+            file_uri = self.file_mapper.get_file_uri(
+                self.backend.beets_api.get_track_path(track_id)
+            )
+            if file_uri is not None:
+                return file_uri
+        if self.audio_cache is not None:
+            self.audio_cache.read_ahead(track_id)
+            file_uri = self.audio_cache.get_file_uri(track_id)
+            if file_uri is not None:
+                return file_uri
         return self.backend.beets_api.get_track_stream_url(track_id)
+
+    def get_following_tracks(self, track_id):
+        """returns the IDs of the tracks following a track on its album
+
+        The tracks of the same album are the most likely tracks to be played
+        next.
+        """
+        track_id = int(track_id)
+        track = self.backend.beets_api.get_track(track_id)
+        if track is None or track.album is None or track.album.uri is None:
+            return []
+        album_id = parse_uri(track.album.uri)[1]
+        track_ids = [
+            parse_uri(ref.uri)[1]
+            for ref in self.backend.beets_api.get_track_refs_by(
+                [("album_id", album_id)],
+                True,  # noqa: FBT003
+                ["disc+", "track+"],
+            )
+        ]
+        if track_id not in track_ids:
+            return []
+        return track_ids[track_ids.index(track_id) + 1 :]
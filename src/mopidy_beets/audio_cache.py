@@ -0,0 +1,171 @@
+import collections
+import logging
+import queue
+import threading
+from pathlib import Path
+
+from mopidy_beets.resilience import BeetsRequestError
+
+logger = logging.getLogger(__name__)
+
+# policies for selecting the files to be removed, if the cache is full
+LEAST_RECENTLY_USED = "lru"
+FIRST_IN_FIRST_OUT = "fifo"
+EVICTION_POLICIES = (LEAST_RECENTLY_USED, FIRST_IN_FIRST_OUT)
+
+# suffix of incomplete downloads
+PARTIAL_SUFFIX = ".part"
+
+
+class AudioCache:
+    """Download the audio files of upcoming tracks into a local directory
+
+    The files are named after the IDs of their tracks.  The total size of
+    the files is limited: the least recently used (or the oldest) files are
+    removed first.  The directory is scanned at startup, thus the files are
+    kept across restarts.
+    Downloads are handled one by one by a background thread.  Failures are
+    ignored: the track is streamed via the beets web API instead.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        directory,
+        max_bytes,
+        download,
+        get_following_tracks,
+        *,
+        read_ahead=2,
+        eviction_policy=LEAST_RECENTLY_USED,
+    ):
+        if eviction_policy not in EVICTION_POLICIES:
+            msg = f"Unknown eviction policy: {eviction_policy}"
+            raise ValueError(msg)
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+        # the function writing the audio file of a track ID to a file object
+        self._download = download
+        # the function delivering the IDs of the tracks following a track ID
+        self._get_following_tracks = get_following_tracks
+        self._read_ahead = read_ahead
+        self._eviction_policy = eviction_policy
+        self._lock = threading.Lock()
+        # the sizes of the cached files (the next file to be removed first)
+        self._files = collections.OrderedDict()
+        self._total_bytes = 0
+        self._tasks = queue.Queue()
+        self._worker = None
+        self._stop_event = threading.Event()
+        self._scan_directory()
+
+    def _get_path(self, track_id):
+        return self._directory / str(track_id)
+
+    def _scan_directory(self):
+        self._directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self._directory.iterdir():
+            if path.suffix == PARTIAL_SUFFIX:
+                # an interrupted download
+                path.unlink(missing_ok=True)
+            elif path.is_file():
+                stat = path.stat()
+                files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._files[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self, keep=None):
+        """remove files until the size limit is satisfied (except 'keep')"""
+        for name in list(self._files):
+            if self._total_bytes <= self._max_bytes:
+                break
+            if name == keep:
+                continue
+            self._total_bytes -= self._files.pop(name)
+            self._get_path(name).unlink(missing_ok=True)
+            logger.debug(f"Beets - removed track {name} from the audio cache")
+
+    def get_file_uri(self, track_id):
+        """returns the "file://" URI of a cached track (or None)"""
+        name = str(track_id)
+        with self._lock:
+            if name not in self._files:
+                return None
+            if self._eviction_policy == LEAST_RECENTLY_USED:
+                self._files.move_to_end(name)
+                # the modification time preserves the order across restarts
+                self._get_path(name).touch()
+        return self._get_path(name).as_uri()
+
+    def read_ahead(self, track_id):
+        """download the tracks following the given track in the background"""
+        if not self._read_ahead or self._stop_event.is_set():
+            return
+        self._tasks.put(track_id)
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._process_tasks, name="BeetsAudioCache", daemon=True
+                )
+                self._worker.start()
+
+    def stop(self):
+        self._stop_event.set()
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._tasks.put(None)
+            worker.join()
+
+    def join(self):
+        """wait until all scheduled downloads are finished"""
+        self._tasks.join()
+
+    def _process_tasks(self):
+        while True:
+            track_id = self._tasks.get()
+            try:
+                if track_id is None:
+                    break
+                self._process(track_id)
+            finally:
+                self._tasks.task_done()
+
+    def _process(self, track_id):
+        try:
+            following_ids = self._get_following_tracks(track_id)[: self._read_ahead]
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Beets - Failed to determine the following tracks: {exc}")
+            return
+        for following_id in following_ids:
+            if self._stop_event.is_set():
+                return
+            with self._lock:
+                if str(following_id) in self._files:
+                    continue
+            self.store(following_id)
+
+    def store(self, track_id):
+        """download the audio file of a track into the cache"""
+        name = str(track_id)
+        path = self._get_path(name)
+        partial_path = path.with_name(name + PARTIAL_SUFFIX)
+        try:
+            with partial_path.open("wb") as output:
+                self._download(track_id, output)
+        except (BeetsRequestError, OSError) as exc:
+            logger.info(f"Beets - Failed to cache the audio file of {name}: {exc}")
+            partial_path.unlink(missing_ok=True)
+            return
+        size = partial_path.stat().st_size
+        if size > self._max_bytes:
+            partial_path.unlink()
+            return
+        partial_path.replace(path)
+        logger.debug(f"Beets - added track {name} to the audio cache")
+        with self._lock:
+            self._total_bytes += size - self._files.pop(name, 0)
+            self._files[name] = size
+            self._evict(keep=name)
@@ -19,7 +19,7 @@ class AlbumsCategoryBrowser(GenericBrowserBase):
         ]
 
     def get_directory(self, key):
-        albums = self.api.get_albums_by(
+        albums = self.api.get_album_summaries_by(
             [(self.field, key)],
             True,  # noqa: FBT003
             self.sort_fields,
@@ -43,11 +43,10 @@ class AlbumsByGenreBrowser(AlbumsCategoryBrowser):
     sort_fields = ("albumartist", "original_year+", "year+", "album+")
 
     def _get_label(self, album):
-        artists = " / ".join([artist.name for artist in album.artists])
-        if artists and album.date:
-            return f"{artists} - {album.name} ({album.date.split('-')[0]})"
-        if artists:
-            return f"{artists} - {album.name}"
+        if album.artist and album.date:
+            return f"{album.artist} - {album.name} ({album.date.split('-')[0]})"
+        if album.artist:
+            return f"{album.artist} - {album.name}"
         return album.name
 
 
@@ -62,7 +61,6 @@ class AlbumsByYearBrowser(AlbumsCategoryBrowser):
     )
 
     def _get_label(self, album):
-        artists = " / ".join([artist.name for artist in album.artists])
-        if artists:
-            return f"{artists} - {album.name}"
+        if album.artist:
+            return f"{album.artist} - {album.name}"
         return album.name
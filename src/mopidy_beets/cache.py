@@ -0,0 +1,316 @@
+import concurrent.futures
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import cast
+
+from mopidy_beets.resilience import BeetsRequestError
+
+logger = logging.getLogger(__name__)
+
+# maximum number of seconds to wait for the result of a concurrent call (see
+# 'LRUCache.call_once'), before the result is computed again
+CALL_WAIT_TIMEOUT = 30
+
+# the state of the current thread regarding 'LRUCache.call_once'
+_call_state = threading.local()
+
+
+def _freeze(value):
+    """convert lists (e.g. query attributes) into hashable tuples"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _bind_arguments(signature, instance, args, kwargs):
+    """return the positional and keyword-only arguments of a method call
+
+    Arguments passed by keyword or omitted (defaults) are turned into
+    positional arguments.  Thus equal calls result in equal cache keys.
+    """
+    bound = signature.bind(instance, *args, **kwargs)
+    bound.apply_defaults()
+    return bound.args[1:], bound.kwargs
+
+
+def disable_call_waiting():
+    """compute results instead of waiting for concurrent calls (see
+    'LRUCache.call_once') within the current thread
+
+    This is necessary for the workers of a bounded thread pool: the call in
+    progress may wait for a task queued behind the workers.
+    """
+    _call_state.no_waiting = True
+
+
+def _may_wait_for_calls():
+    # A thread running a call must not wait for another one: the other
+    # call may wait for the first one.
+    return not (
+        getattr(_call_state, "no_waiting", False)
+        or getattr(_call_state, "running_calls", 0)
+    )
+
+
+def _store(storage, key, value):
+    storage.put(key, value)
+    return value
+
+
+class LRUCache:
+    """A bounded and thread-safe cache with an expiry time for its entries
+
+    The least recently used entry is evicted, as soon as the number of
+    entries exceeds 'max_size'.
+    Entries older than 'ttl' seconds are treated as missing by 'get'.  They
+    are kept (until they are evicted) for situations where an outdated value
+    is better than none (see 'lookup').
+    Concurrent retrievals of the same missing value are coalesced (see
+    'call_once').
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # the futures of the retrievals in progress
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        """return the cached value or raise a KeyError"""
+        value, is_fresh = self.lookup(key)
+        if not is_fresh:
+            raise KeyError(key)
+        return value
+
+    def lookup(self, key):
+        """return the cached value and whether it is fresh (or raise a KeyError)
+
+        Expired values are counted as misses.
+        """
+        now = time.monotonic()
+        with self._lock:
+            try:
+                value, timestamp = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self._entries.move_to_end(key)
+            if now - timestamp > self.ttl:
+                self.expirations += 1
+                self.misses += 1
+                return value, False
+            self.hits += 1
+            return value, True
+
+    def put(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def call_once(self, key, func):
+        """return the result of 'func' (e.g. retrieving and storing a value)
+
+        Concurrent callers with the same key do not run 'func' again: they
+        wait for the result (or the exception) of the call in progress.
+        Callers which must not wait (see 'disable_call_waiting') or which are
+        running a call themselves run 'func' instead.  The same happens, if
+        the call in progress is not finished within 'CALL_WAIT_TIMEOUT'.
+        """
+        may_wait = _may_wait_for_calls()
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                self._in_flight[key] = concurrent.futures.Future()
+            elif may_wait:
+                self.coalesced += 1
+        if future is not None:
+            if may_wait:
+                concurrent.futures.wait([future], timeout=CALL_WAIT_TIMEOUT)
+                if future.done():
+                    return future.result()
+                logger.debug(f"Beets - Repeating a stalled call ({key})")
+            return func()
+        _call_state.running_calls = getattr(_call_state, "running_calls", 0) + 1
+        try:
+            result = func()
+        except BaseException as exc:
+            self._finish_call(key).set_exception(exc)
+            raise
+        finally:
+            _call_state.running_calls -= 1
+        self._finish_call(key).set_result(result)
+        return result
+
+    def _finish_call(self, key):
+        with self._lock:
+            return self._in_flight.pop(key)
+
+    def get_statistics(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+            }
+
+
+class CacheRegistry:
+    """Manage the named caches of an object (e.g. one cache per method)
+
+    Expired values may be delivered immediately, while they are refreshed in
+    the background ('stale_while_revalidate').
+    """
+
+    def __init__(self, max_size=4096, ttl=3600, *, stale_while_revalidate=False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self._caches = {}
+        self._lock = threading.Lock()
+        self._refresh_executor = None
+        # the keys of the refreshs in progress
+        self._refreshing = set()
+
+    def get_cache(self, name, max_size=None):
+        with self._lock:
+            try:
+                return self._caches[name]
+            except KeyError:
+                if max_size is None:
+                    max_size = self.max_size
+                storage = LRUCache(min(max_size, self.max_size), self.ttl)
+                self._caches[name] = storage
+                return storage
+
+    def clear(self):
+        with self._lock:
+            caches = list(self._caches.values())
+        for storage in caches:
+            storage.clear()
+
+    def refresh_later(self, key, refresh):
+        """run a function in the background, which refreshes cached values
+
+        Concurrent refreshs with the same key are skipped.  Failures are
+        ignored: the expired values are kept.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if self._refresh_executor is None:
+                self._refresh_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="BeetsCacheRefresh"
+                )
+            self._refreshing.add(key)
+            self._refresh_executor.submit(self._refresh, key, refresh)
+
+    def _refresh(self, key, refresh):
+        try:
+            refresh()
+        except BeetsRequestError as exc:
+            logger.debug(f"Beets - Failed to refresh expired values: {exc}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stop(self):
+        """discard pending refreshs"""
+        with self._lock:
+            if self._refresh_executor is not None:
+                self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+                self._refresh_executor = None
+
+    def get_statistics(self):
+        """return the statistics of all caches indexed by their name"""
+        with self._lock:
+            caches = dict(self._caches)
+        return {name: storage.get_statistics() for name, storage in caches.items()}
+
+
+class cache:  # noqa: N801
+    """Decorator for caching the results of a method
+
+    The decorated method needs to belong to an object with a 'caches'
+    attribute (a CacheRegistry).  Every method uses its own cache.
+    The optional 'max_size' limits the size of the method's cache below the
+    size configured for the registry.
+    If the method fails with a BeetsRequestError, an expired value is
+    delivered instead.  Without such a value, the result of 'fallback' (if
+    given) is delivered, but not cached.
+    Concurrent calls with equal arguments wait for the first call instead of
+    sending the same request again.
+    """
+
+    def __init__(self, max_size=None, fallback=None):
+        self.max_size = max_size
+        self.fallback = fallback
+
+    def __call__[**P, R](self, func: Callable[P, R]) -> Callable[P, R]:
+        # the annotations keep the signature of the method for type checkers
+        method: Callable[..., R] = func
+        name = func.__name__
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def _memoized(instance, *args, **kwargs):
+            caches = instance.caches
+            storage = caches.get_cache(name, self.max_size)
+            args, kwargs = _bind_arguments(signature, instance, args, kwargs)
+            key = _freeze((*args, *sorted(kwargs.items())))
+            try:
+                stale_value, is_fresh = storage.lookup(key)
+            except KeyError:
+                stale_value, is_stale = None, False
+            except TypeError:
+                # unhashable arguments cannot be cached
+                return method(instance, *args, **kwargs)
+            else:
+                if is_fresh:
+                    return stale_value
+                is_stale = True
+                if caches.stale_while_revalidate:
+                    caches.refresh_later(
+                        (name, key),
+                        lambda: storage.put(key, method(instance, *args, **kwargs)),
+                    )
+                    return stale_value
+            try:
+                # concurrent callers share a single request
+                return storage.call_once(
+                    key,
+                    lambda: _store(storage, key, method(instance, *args, **kwargs)),
+                )
+            except BeetsRequestError as exc:
+                if is_stale:
+                    logger.info(f"Beets - Delivering an expired result: {exc}")
+                    return stale_value
+                if self.fallback is None:
+                    raise
+                logger.info(f"Beets - Request failed: {exc}")
+                return self.fallback()
+
+        return cast("Callable[P, R]", _memoized)
@@ -1,103 +1,431 @@
+import concurrent.futures
+import itertools
 import logging
+import math
 import re
+import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
+import weakref
 from http import HTTPStatus
 
 import requests
 from mopidy import httpclient
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
 
 import mopidy_beets
-from mopidy_beets.translator import parse_album, parse_track
+from mopidy_beets.cache import CacheRegistry, cache, disable_call_waiting
+from mopidy_beets.matching import filter_exact_matches
+from mopidy_beets.metrics import MetricsReporter, RequestMetrics
+from mopidy_beets.resilience import BeetsRequestError, CircuitBreaker
+from mopidy_beets.streaming import iterate_json_array
+from mopidy_beets.sync import ItemSynchronizer
+from mopidy_beets.translator import (
+    parse_album,
+    parse_album_summary,
+    parse_track,
+    parse_track_ref,
+)
 
 logger = logging.getLogger(__name__)
 
-
-class cache:  # noqa: N801
-    # TODO: merge this to util library
-
-    def __init__(self, ctl=8, ttl=3600):
-        self.cache = {}
-        self.ctl = ctl
-        self.ttl = ttl
-        self._call_count = 1
-
-    def __call__(self, func):
-        def _memoized(*args):
-            self.func = func
-            now = time.time()
-            try:
-                value, last_update = self.cache[args]
-                age = now - last_update
-                if self._call_count >= self.ctl or age > self.ttl:
-                    self._call_count = 1
-                    raise AttributeError  # noqa: TRY301
-
-                self._call_count += 1
-
-            except (KeyError, AttributeError):
-                value = self.func(*args)
-                self.cache[args] = (value, now)
-                return value
-
-            except TypeError:
-                return self.func(*args)
-
-            else:
-                return value
-
-        return _memoized
+# number of bytes read at once from streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# number of track datasets parsed together (sharing one request for albums)
+PARSE_BATCH_SIZE = 1000
+
+# Item attributes, which are shared by all tracks of an album.  Distinct
+# values of these attributes are determined via albums (instead of tracks),
+# if possible (see 'get_unique_track_attributes_by').
+ALBUM_FIELDS = frozenset(
+    (
+        "album",
+        "albumartist",
+        "albumartist_sort",
+        "mb_albumid",
+        "mb_albumartistid",
+        "year",
+        "month",
+        "day",
+    )
+)
+
+# The beets web API interprets dates in the local time of the beets server,
+# which may differ from the local time of the Mopidy host.  As long as the
+# UTC offset of the server is unknown, queries for modified items start
+# earlier by this number of seconds.
+MODIFICATION_QUERY_MARGIN = 24 * 60 * 60
+
+# the UTC offsets of all time zones: multiples of 15 minutes between -12 and
+# +14 hours (see '_get_server_utc_offset')
+UTC_OFFSET_STEP = 15 * 60
+UTC_OFFSETS = range(-12 * 60 * 60, 14 * 60 * 60 + 1, UTC_OFFSET_STEP)
+
+DATE_QUERY_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# a field known to every beets library (used for detecting the support of
+# the "/values/" endpoint of the beets web API)
+VALUES_PROBE_FIELD = "format"
+
+# responses indicating a temporary problem of the server (worth a retry)
+RETRY_STATUS_CODES = (
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+)
+
+
+def _format_date_query(field, server_time):
+    """returns a query for dates not before the given 'struct_time'"""
+    since = time.strftime(DATE_QUERY_FORMAT, server_time)
+    # The colons within the date must not be escaped: beets splits the field
+    # name from the value at the first colon, anyway.
+    return f"{_quote_and_encode(field)}:{urllib.parse.quote(since)}.."
+
+
+def _quote_and_encode(text):
+    if isinstance(text, (int, float)):
+        text = str(text)
+    # Escape colons. The beets web API uses the colon to separate
+    # field name and search term.
+    text = text.replace(":", r"\:")
+    # quoting for the query string
+    return urllib.parse.quote(text)
 
 
 class BeetsRemoteClient:
-    def __init__(self, endpoint, proxy_config, request_timeout=4):
+    def __init__(  # noqa: PLR0913
+        self,
+        endpoint,
+        proxy_config,
+        *,
+        connect_timeout=4,
+        read_timeout=4,
+        pool_size=10,
+        max_retries=2,
+        retry_backoff=0.5,
+        compression=True,
+        cache_size=4096,
+        cache_ttl=3600,
+        id_chunk_size=100,
+        max_concurrent_requests=1,
+        stream_responses=False,
+        stale_while_revalidate=False,
+        circuit_breaker_threshold=5,
+        circuit_breaker_timeout=30,
+        metrics_interval=0,
+        metrics_file=None,
+    ):
         super().__init__()
-        self._request_timeout = request_timeout
-        self.api = self._get_session(proxy_config)
+        self._request_timeout = (connect_timeout, read_timeout)
+        self.caches = CacheRegistry(
+            max_size=cache_size,
+            ttl=cache_ttl,
+            stale_while_revalidate=stale_while_revalidate,
+        )
+        # stop sending requests to a failing server for a while
+        self.circuit_breaker = CircuitBreaker(
+            threshold=circuit_breaker_threshold,
+            reset_timeout=circuit_breaker_timeout,
+        )
+        # statistics of all requests (see 'get_request_statistics')
+        self.metrics = RequestMetrics()
+        self._metrics_reporter = None
+        if metrics_interval > 0:
+            self._metrics_reporter = MetricsReporter(
+                self.get_statistics, metrics_interval, metrics_file
+            )
+        # maximum number of IDs requested at once (e.g. "/item/1,2,3")
+        self.id_chunk_size = id_chunk_size
+        # independent requests may be sent concurrently (see 'map_concurrently')
+        self.max_concurrent_requests = max_concurrent_requests
+        # parse query results incrementally (see '_get_results')
+        self.stream_responses = stream_responses
+        self._worker_state = threading.local()
+        self._executor = None
+        if max_concurrent_requests > 1:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_concurrent_requests,
+                thread_name_prefix="BeetsRequest",
+                initializer=self._initialize_worker,
+            )
+        # Equal artists and albums are shared by all parsed tracks and albums.
+        # They are kept only as long as they are in use (e.g. in a cache).
+        self.known_artists = weakref.WeakValueDictionary()
+        self.known_albums = weakref.WeakValueDictionary()
+        # whether the beets web API supports "/item/values/FIELD" (None: unknown)
+        self._values_endpoint_supported = None
+        self._capabilities_lock = threading.Lock()
+        # the UTC offset of the beets server (see '_get_server_utc_offset') and
+        # the IDs of datasets used for determining it (by path and date field)
+        self._server_utc_offset = None
+        self._time_references = {}
+        # all tracks of the library (see 'get_tracks')
+        self._tracks = {}
+        self._tracks_lock = threading.Lock()
+        self._tracks_synchronized = -math.inf
+        # let every step of the synchronization occupy all workers
+        self._item_synchronizer = ItemSynchronizer(
+            self, id_chunk_size * max_concurrent_requests
+        )
+        self.api = self._get_session(
+            proxy_config,
+            # every concurrent request occupies a connection
+            pool_size=max(pool_size, max_concurrent_requests),
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+            compression=compression,
+        )
         self.api_endpoint = endpoint
         logger.info("Configured for Beets remote library %s", endpoint)
 
-    def _get_session(self, proxy_config):
+    def _get_session(
+        self, proxy_config, *, pool_size, max_retries, retry_backoff, compression
+    ):
         proxy = httpclient.format_proxy(proxy_config)
         full_user_agent = httpclient.format_user_agent(
             f"{mopidy_beets.Extension.dist_name}/{mopidy_beets.__version__}"
         )
         session = requests.Session()
         session.proxies.update({"http": proxy, "https": proxy})
-        session.headers.update({"user-agent": full_user_agent})
+        session.headers.update(
+            {
+                "user-agent": full_user_agent,
+                "accept-encoding": "gzip" if compression else "identity",
+            }
+        )
+        # Only idempotent requests are repeated.  A server failing
+        # persistently is handled by the circuit breaker afterwards.  Read
+        # timeouts are not repeated: a stalled server would block the caller
+        # for multiple timeouts.
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            backoff_factor=retry_backoff,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(("GET", "HEAD")),
+            raise_on_status=False,
+            # a long delay requested by the server would block the caller
+            respect_retry_after_header=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
         return session
 
-    @cache()
+    def start(self):
+        """start background activities (called when the backend starts)"""
+        if self._metrics_reporter is not None:
+            self._metrics_reporter.start()
+
+    def stop(self):
+        """stop background activities (called when the backend stops)"""
+        if self._metrics_reporter is not None:
+            self._metrics_reporter.stop()
+        self.caches.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _initialize_worker(self):
+        self._worker_state.is_worker = True
+        # a worker waiting for a call could block the request of this call
+        disable_call_waiting()
+
+    def map_concurrently(self, func, iterable):
+        """returns the results of 'func' applied to every item of 'iterable'
+
+        The function calls are executed concurrently (up to the configured
+        maximum number of concurrent requests).  The order of the results
+        corresponds to the order of the items.
+        Calls from within a worker are executed sequentially in order to avoid
+        a deadlock of the (bounded) pool of workers.
+        """
+        if self._executor is None or getattr(self._worker_state, "is_worker", False):
+            return [func(item) for item in iterable]
+        return list(self._executor.map(func, iterable))
+
+    def get_cache_statistics(self):
+        """returns the hit/miss/eviction counters of all caches"""
+        return self.caches.get_statistics()
+
+    def get_request_statistics(self):
+        """returns the count, latencies, size and parse time of all requests
+        grouped by endpoint patterns (e.g. "/item/query")
+        """
+        return self.metrics.get_statistics()
+
+    def get_statistics(self):
+        """returns the request and the cache statistics"""
+        return self.get_request_statistics(), self.get_cache_statistics()
+
     def get_tracks(self):
-        track_ids = self._get("/item/").get("item_ids") or []
-        return [self.get_track(track_id) for track_id in track_ids]
+        """returns all tracks of the library
+
+        The tracks are kept in memory.  Afterwards only the items added,
+        modified or removed in the meantime are retrieved (at most once
+        within the cache's expiry time).
+        """
+        with self._tracks_lock:
+            if time.monotonic() - self._tracks_synchronized > self.caches.ttl:
+                removed_ids, changed_datasets = self._item_synchronizer.synchronize()
+                for track_id in removed_ids:
+                    self._tracks.pop(track_id, None)
+                for datasets in changed_datasets:
+                    for dataset, track in self._iterate_parsed_tracks(datasets):
+                        self._tracks[dataset["id"]] = track
+                self._tracks_synchronized = time.monotonic()
+            return list(self._tracks.values())
 
-    @cache(ctl=16)
     def get_track(self, track_id):
-        return parse_track(self._get(f"/item/{track_id}"), self)
+        return self.get_tracks_by_ids([track_id]).get(track_id)
 
-    @cache(ctl=16)
     def get_album(self, album_id):
-        return parse_album(self._get(f"/album/{album_id}"), self)
+        return self.get_albums_by_ids([album_id]).get(album_id)
+
+    def get_tracks_by_ids(self, track_ids):
+        """returns a dict of track IDs and their parsed tracks
+
+        The tracks are retrieved in chunks via the beets API's support for
+        comma separated lists of IDs (e.g. "/item/1,2,3").
+        """
+        return self._get_cached_by_ids("get_track", track_ids, self._retrieve_tracks)
+
+    def _retrieve_tracks(self, track_ids):
+        datasets = self.get_datasets_by_ids("/item", "items", track_ids)
+        return {
+            dataset["id"]: track
+            for dataset, track in self._iterate_parsed_tracks(datasets)
+        }
+
+    def get_albums_by_ids(self, album_ids):
+        """returns a dict of album IDs and their parsed albums
+
+        The albums are retrieved in chunks via the beets API's support for
+        comma separated lists of IDs (e.g. "/album/1,2,3").
+        """
+        return self._get_cached_by_ids(
+            "get_album", sorted(set(album_ids)), self._retrieve_albums
+        )
 
-    @cache()
+    def _retrieve_albums(self, album_ids):
+        albums = {}
+        for dataset in self.get_datasets_by_ids("/album", "albums", album_ids):
+            try:
+                albums[dataset["id"]] = self._parse_album(dataset)
+            except (ValueError, KeyError) as exc:
+                logger.info(f"Beets - Failed to parse album data: {exc}")
+        return albums
+
+    def _get_cached_by_ids(self, cache_name, ids, retrieve):
+        """returns a dict of IDs and their cached values
+
+        Missing values are retrieved at once via 'retrieve' (a function
+        returning a dict of IDs and values).  Expired values are delivered, if
+        the retrieval fails or if they should be refreshed in the background
+        (see 'stale_while_revalidate').
+        """
+        storage = self.caches.get_cache(cache_name)
+        values = {}
+        expired_values = {}
+        missing_ids = []
+        for value_id in dict.fromkeys(ids):
+            try:
+                value, is_fresh = storage.lookup((value_id,))
+            except KeyError:
+                missing_ids.append(value_id)
+                continue
+            if is_fresh:
+                values[value_id] = value
+            else:
+                expired_values[value_id] = value
+
+        def refresh(value_ids):
+            retrieved = retrieve(value_ids)
+            for value_id, value in retrieved.items():
+                storage.put((value_id,), value)
+            return retrieved
+
+        if expired_values and self.caches.stale_while_revalidate:
+            expired_ids = tuple(expired_values)
+            self.caches.refresh_later(
+                (cache_name, expired_ids), lambda: refresh(expired_ids)
+            )
+            values.update(expired_values)
+        else:
+            missing_ids.extend(expired_values)
+        if missing_ids:
+            try:
+                # concurrent lookups of the same IDs share a single request
+                values.update(
+                    storage.call_once(tuple(missing_ids), lambda: refresh(missing_ids))
+                )
+            except BeetsRequestError as exc:
+                logger.info(f"Beets - Delivering expired results: {exc}")
+                values.update(expired_values)
+        return values
+
+    @cache(fallback=list)
     def get_tracks_by(self, attributes, exact_text, sort_fields):
         tracks = self._get_objects_by_attribute(
             "/item", attributes, exact_text, sort_fields
         )
         return self._parse_multiple_tracks(tracks)
 
-    @cache()
+    @cache(fallback=lambda: ([], None))
+    def get_tracks_page(self, attributes, exact_text, sort_fields, limit, offset=0):
+        """returns a page of matching tracks and the offset of the next page
+
+        Only the 'limit' matches following the first 'offset' matches are
+        parsed.  A streamed response (see 'stream_responses') is aborted as
+        soon as the page is complete.
+        The offset of the next page is None, if there are no further matches.
+        """
+        datasets = self._get_objects_by_attribute(
+            "/item", attributes, exact_text, sort_fields
+        )
+        # one additional match reveals the existence of a next page
+        page = list(itertools.islice(datasets, offset, offset + limit + 1))
+        # a list is returned, unless the response is streamed
+        close = getattr(datasets, "close", None)
+        if close is not None:
+            # stop receiving the remaining matches
+            close()
+        next_offset = offset + limit if len(page) > limit else None
+        return self._parse_multiple_tracks(page[:limit]), next_offset
+
+    @cache(fallback=list)
     def get_albums_by(self, attributes, exact_text, sort_fields):
         albums = self._get_objects_by_attribute(
             "/album", attributes, exact_text, sort_fields
         )
         return self._parse_multiple_albums(albums)
 
-    def _get_objects_by_attribute(self, base_path, attributes, exact_text, sort_fields):  # noqa: C901
+    @cache(fallback=list)
+    def get_track_refs_by(self, attributes, exact_text, sort_fields):
+        """returns Refs of the matching tracks (see 'get_tracks_by')
+
+        Only the ID and the title of every track are used.  Neither complete
+        tracks nor their albums are parsed.
+        """
+        datasets = self._get_objects_by_attribute(
+            "/item", attributes, exact_text, sort_fields
+        )
+        return self._parse_multiple(datasets, parse_track_ref, "track")
+
+    @cache(fallback=list)
+    def get_album_summaries_by(self, attributes, exact_text, sort_fields):
+        """returns the attributes needed for browsing the matching albums
+        (see 'AlbumSummary') instead of complete albums
+        """
+        datasets = self._get_objects_by_attribute(
+            "/album", attributes, exact_text, sort_fields
+        )
+        return self._parse_multiple(datasets, parse_album_summary, "album")
+
+    def _get_objects_by_attribute(self, base_path, attributes, exact_text, sort_fields):
         """The beets web-api accepts queries like:
             /item/query/album_id:183/track:2
             /item/query/album:Foo
@@ -106,7 +434,8 @@ class BeetsRemoteClient:
         'is in' matches. Thus we need to filter the result, since we want
         exact matches.
 
-        @param attributes: attributes to be matched
+        @param attributes: attributes to be matched (a tuple of values matches
+                           any of these values)
         @type attribute: list of key/value pairs or strings
         @param exact_text: True for exact matches, False for
                            case-insensitive 'is in' matches (only relevant
@@ -114,39 +443,41 @@ class BeetsRemoteClient:
         @type exact_text: bool
         @param sort_fields: fieldnames, each followed by '+' or '-'
         @type sort_fields: list of strings
-        @rtype: list of json datasets describing tracks or albums
+        @rtype: list (or iterator in streaming mode) of json datasets
+                describing tracks or albums
         """
         # assemble the query string
         query_parts = []
         # only used for 'exact_text'
         exact_query_list = []
 
-        def quote_and_encode(text):
-            if isinstance(text, (int, float)):
-                text = str(text)
-            # Escape colons. The beets web API uses the colon to separate
-            # field name and search term.
-            text = text.replace(":", r"\:")
-            # quoting for the query string
-            return urllib.parse.quote(text)
-
         for attribute in attributes:
             if isinstance(attribute, str):
-                query_parts.append(quote_and_encode(attribute))
+                query_parts.append(_quote_and_encode(attribute))
                 exact_query_list.append((None, attribute))
+            elif isinstance(attribute[1], (tuple, list)):
+                # match any of the given values (always exact)
+                key = attribute[0].lower()
+                alternatives = "|".join(re.escape(str(value)) for value in attribute[1])
+                regex_query = f"^(?:{alternatives})$"
+                query_parts.append(
+                    f"{_quote_and_encode(key)}::{_quote_and_encode(regex_query)}"
+                )
             else:
                 # the beets API accepts upper and lower case, but always
                 # returns lower case attributes
                 key = attribute[0].lower()
                 value = attribute[1]
-                query_parts.append(f"{quote_and_encode(key)}:{quote_and_encode(value)}")
+                query_parts.append(
+                    f"{_quote_and_encode(key)}:{_quote_and_encode(value)}"
+                )
                 # Try to add a simple regex filter, if we look for a string.
                 # This will reduce the resource consumption of the query on
                 # the server side (and for our 'exact' matching below).
                 if exact_text and isinstance(value, str):
                     regex_query = f"^{re.escape(value)}$"
                     beets_query = (
-                        f"{quote_and_encode(key)}::{quote_and_encode(regex_query)}"
+                        f"{_quote_and_encode(key)}::{_quote_and_encode(regex_query)}"
                     )
                     logger.debug(f"Beets - regular expression query: {beets_query}")
                     query_parts.append(beets_query)
@@ -156,29 +487,25 @@ class BeetsRemoteClient:
         # add sorting fields
         for sort_field in sort_fields or []:
             if (len(sort_field) > 1) and (sort_field[-1] in ("-", "+")):
-                query_parts.append(quote_and_encode(sort_field))
+                query_parts.append(_quote_and_encode(sort_field))
             else:
                 logger.info("Beets - invalid sorting field ignore: %s", sort_field)
         query_string = "/".join(query_parts)
         query_url = f"{base_path}/query/{query_string}"
         logger.debug("Beets query: %s", query_url)
-        items = self._get(query_url)["results"]
+        items = self._get_results(query_url)
         if exact_text:
-            # verify that text attributes do not just test 'is in', but match
-            # equality
-            for key, value in exact_query_list:
-                if key is None:
-                    # the value must match one of the item attributes
-                    items = [item for item in items if value in item.values()]
-                # filtering is necessary only for text based attributes
-                elif items and isinstance(items[0][key], str):
-                    items = [item for item in items if item[key] == value]
+            items = filter_exact_matches(items, exact_query_list)
         return items
 
-    @cache()
+    @cache(max_size=1, fallback=list)
     def get_artists(self):
         """returns all artists of one or more tracks"""
-        names = self._get("/artist/")["artist_names"]
+        result = self._get("/artist/")
+        if result is None:
+            msg = "Failed to retrieve the artists"
+            raise BeetsRequestError(msg)
+        names = result["artist_names"]
         names.sort()
         # remove empty names
         return [name for name in names if name]
@@ -191,65 +518,205 @@ class BeetsRemoteClient:
         sort_field = {"albumartist": "albumartist_sort"}.get(field, field)
         return self._get_unique_attribute_values("/album", field, sort_field)
 
-    @cache(ctl=32)
+    @cache(fallback=list)
+    def get_unique_track_attributes_by(self, field, attributes):
+        """returns the distinct values of a field of all tracks exactly
+        matching the attributes (sorted like 'get_sorted_unique_track_attributes')
+
+        A query involving only album attributes is answered by the albums.
+        Their number is much lower than the number of tracks.
+        """
+        fields = {field}
+        for attribute in attributes:
+            # strings (matching any field) need to be applied to the tracks
+            fields.add(None if isinstance(attribute, str) else attribute[0].lower())
+        base_path = "/album" if fields <= ALBUM_FIELDS else "/item"
+        sort_field = {"albumartist": "albumartist_sort"}.get(field, field)
+        datasets = self._get_objects_by_attribute(
+            base_path, attributes, exact_text=True, sort_fields=[f"{sort_field}+"]
+        )
+        return list(dict.fromkeys(dataset.get(field) for dataset in datasets))
+
+    def _has_values_endpoint(self):
+        """returns whether the beets web API supports "/item/values/FIELD"
+
+        The endpoint was added in beets v1.3.18.  The server is probed only
+        once.
+        """
+        with self._capabilities_lock:
+            if self._values_endpoint_supported is None:
+                try:
+                    self._get(
+                        f"/item/values/{VALUES_PROBE_FIELD}"
+                        f"?sort_key={VALUES_PROBE_FIELD}",
+                        raise_not_found=True,
+                    )
+                except KeyError:
+                    logger.warning(
+                        "Failed to use the /item/values/KEY feature of the Beets "
+                        "API (introduced in v1.3.18). Falling back to the "
+                        "slower and more resource intensive manual approach. "
+                        "Please upgrade Beets, if possible."
+                    )
+                    self._values_endpoint_supported = False
+                else:
+                    self._values_endpoint_supported = True
+            return self._values_endpoint_supported
+
+    @cache(fallback=list)
     def _get_unique_attribute_values(self, base_url, field, sort_field):
         """returns all artists, genres, ... of tracks or albums"""
-        if not hasattr(self, "__legacy_beets_api_detected"):
+        if self._has_values_endpoint():
             try:
                 result = self._get(
                     f"{base_url}/values/{field}?sort_key={sort_field}",
                     raise_not_found=True,
                 )
             except KeyError:
-                # The above URL was added to the Beets API after v1.3.17
-                # Probably we are working against an older version.
-                logger.warning(
-                    "Failed to use the /item/unique/KEY feature of the Beets "
-                    "API (introduced in v1.3.18). Falling back to the "
-                    "slower and more resource intensive manual approach. "
-                    "Please upgrade Beets, if possible."
-                )
-                # Warn only once and use the manual approach for all future
-                # requests.
-                self.__legacy_beets_api_detected = True
-                # continue below with the fallback
+                # The endpoint supports only the fixed fields of beets (not
+                # flexible attributes).
+                logger.debug(f"Beets - Collecting the values of {field} manually")
             else:
-                return result["values"]
-        # Fallback: use manual filtering (requires too much time and memory for
-        # most collections).
-        sorted_items = self._get(f"{base_url}/query/{sort_field}+")["results"]
-        # extract the wanted field and remove all duplicates
-        unique_values = []
-        for item in sorted_items:
-            value = item[field]
-            if not unique_values or (value != unique_values[-1]):
-                unique_values.append(value)
-        return unique_values
+                return result["values"] if result else []
+        return self._collect_unique_values(base_url, field, sort_field)
+
+    def _collect_unique_values(self, base_url, field, sort_field):
+        """returns the distinct values of a field of all tracks or albums
+
+        All datasets are received and parsed one by one (regardless of
+        'stream_responses').  Only the distinct values are kept (in the
+        order of the datasets).
+        """
+        datasets = self._get_streamed(f"{base_url}/query/{sort_field}+", "results")
+        return list(dict.fromkeys(dataset.get(field) for dataset in datasets))
 
     def get_track_stream_url(self, track_id):
         return f"{self.api_endpoint}/item/{track_id}/file"
 
-    @cache(ctl=32)
+    def download_track(self, track_id, output):
+        """write the audio file of a track to a binary file object
+
+        A BeetsRequestError is raised, if the file cannot be retrieved.
+        """
+        url = self.get_track_stream_url(track_id)
+        with self._send_request(url, stream=True) as response:
+            if response.status_code != HTTPStatus.OK:
+                msg = f"Request {url} failed with status code {response.status_code}"
+                raise BeetsRequestError(msg)
+            try:
+                for chunk in self._iterate_content(
+                    response, url.removeprefix(self.api_endpoint)
+                ):
+                    output.write(chunk)
+            except RequestException as e:
+                msg = f"Request {url} failed: {e}"
+                raise BeetsRequestError(msg) from e
+
+    @cache(fallback=lambda: None)
+    def get_track_path(self, track_id):
+        """returns the path of the track's file on the beets host (or None)
+
+        The beets web API delivers paths only, if its "include_paths" option
+        is enabled.
+        """
+        dataset = self._get(f"/item/{track_id}")
+        return dataset.get("path") if dataset else None
+
     def get_album_art_url(self, album_id):
+        return self.get_album_art_urls([album_id])[album_id]
+
+    def get_album_art_urls(self, album_ids):
+        """returns a dict of album IDs and the URLs of their album art (or None)
+
+        Positive and negative results are cached.
+        """
+        art_cache = self.caches.get_cache("get_album_art_url")
+        urls = {}
+        missing_ids = []
+        for album_id in dict.fromkeys(album_ids):
+            try:
+                urls[album_id] = art_cache.get((album_id,))
+            except KeyError:
+                missing_ids.append(album_id)
+        for album_id, has_art in zip(
+            missing_ids,
+            self.map_concurrently(self._probe_album_art, missing_ids),
+            strict=True,
+        ):
+            url = self._get_album_art_url(album_id) if has_art else None
+            urls[album_id] = url
+            # do not remember failed requests
+            if has_art is not None:
+                art_cache.put((album_id,), url)
+        return urls
+
+    def _get_album_art_url(self, album_id):
+        return f"{self.api_endpoint}/album/{album_id}/art"
+
+    def _probe_album_art(self, album_id):
+        """returns whether the album has album art (or None in case of errors)"""
         # Sadly we cannot determine, if the Beets library really contains album
-        # art. Thus we need to ask for it and check the status code.
-        url = f"{self.api_endpoint}/album/{album_id}/art"
+        # art. Thus we need to ask for it and check the status code.  A HEAD
+        # request avoids the transfer of the image.
+        url = self._get_album_art_url(album_id)
         try:
-            request = urllib.request.urlopen(url)  # noqa: S310
-        except OSError:
-            # DNS problem or similar
+            response = self._send_request(url, method="HEAD")
+        except BeetsRequestError as exc:
+            logger.info(f"Beets - Failed to check album art {url}: {exc}")
             return None
-        request.close()
-        return url if request.getcode() == HTTPStatus.OK else None
+        return response.status_code == HTTPStatus.OK
 
-    def _get(self, url, *, raise_not_found=False):
-        url = self.api_endpoint + url
-        logger.debug(f"Beets - requesting {url}")
+    def _send_request(self, url, *, method="GET", **kwargs):
+        """send a request (unless the circuit breaker is open)
+
+        A BeetsRequestError is raised in case of connection problems or server
+        errors.
+        """
+        if not self.circuit_breaker.allow_request():
+            msg = f"Skipping request {url}: the server failed repeatedly"
+            raise BeetsRequestError(msg)
+        path = url.removeprefix(self.api_endpoint)
+        started = time.perf_counter()
         try:
-            req = self.api.get(url, timeout=self._request_timeout)
+            response = self.api.request(
+                method, url, timeout=self._request_timeout, **kwargs
+            )
         except RequestException as e:
+            self.metrics.record_request(
+                path, time.perf_counter() - started, failed=True
+            )
+            self.circuit_breaker.record_failure()
             logger.error(f"Beets - Request {url}, failed with error {e}")  # noqa: TRY400
-            return None
+            msg = f"Request {url} failed: {e}"
+            raise BeetsRequestError(msg) from e
+        # Streamed responses are received later: only the time until the
+        # headers arrived is measured.
+        is_handled = self._check_status(response)
+        self.metrics.record_request(
+            path, time.perf_counter() - started, failed=not is_handled
+        )
+        if not is_handled:
+            response.close()
+            msg = f"Request {url} failed with status code {response.status_code}"
+            raise BeetsRequestError(msg)
+        return response
+
+    def _check_status(self, response):
+        """returns whether the server handled the request (even if the
+        resource was not found)
+        """
+        if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            self.circuit_breaker.record_failure()
+            return False
+        self.circuit_breaker.record_success()
+        return True
+
+    def _get(self, url, *, raise_not_found=False):
+        path = url
+        url = self.api_endpoint + url
+        logger.debug(f"Beets - requesting {url}")
+        req = self._send_request(url)
+        self.metrics.record_received(path, len(req.content))
         if req.status_code != HTTPStatus.OK:
             logger.error(
                 "Beets - Request %s, failed with status code %s",
@@ -261,22 +728,224 @@ class BeetsRemoteClient:
                 msg = f"URL not found: {url}"
                 raise KeyError(msg)
             return None
-        return req.json()
+        started = time.perf_counter()
+        result = req.json()
+        self.metrics.record_parsing(path, time.perf_counter() - started)
+        return result
+
+    def _get_results(self, url):
+        """returns the datasets delivered by a query
+
+        In streaming mode an iterator is returned, which parses the datasets
+        one by one while the response is received.  Otherwise the complete
+        response is parsed at once and a list is returned.
+        """
+        if self.stream_responses:
+            return self._get_streamed(url, "results")
+        result = self._get(url)
+        return result["results"] if result else []
+
+    def _get_streamed(self, url, root_key):
+        """generate the elements of the list 'root_key' within the response
+
+        The parsing of the elements is included in the time spent on
+        generating them.  Thus the parse time is not recorded.
+        """
+        path = url
+        url = self.api_endpoint + url
+        logger.debug(f"Beets - requesting {url} (streamed)")
+        with self._send_request(url, stream=True) as response:
+            if response.status_code != HTTPStatus.OK:
+                logger.error(
+                    "Beets - Request %s, failed with status code %s",
+                    url,
+                    response.status_code,
+                )
+                return
+            try:
+                yield from iterate_json_array(
+                    self._iterate_content(response, path), root_key
+                )
+            except (RequestException, ValueError) as e:
+                # connection problems as well as truncated or invalid data
+                logger.error(f"Beets - Request {url}, failed with error {e}")  # noqa: TRY400
+                msg = f"Request {url} failed: {e}"
+                raise BeetsRequestError(msg) from e
+
+    def _iterate_content(self, response, path):
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            self.metrics.record_received(path, len(chunk))
+            yield chunk
+
+    def get_ids(self, base_path):
+        """returns the IDs of all items or albums
+
+        A BeetsRequestError is raised, if the IDs cannot be retrieved (an
+        empty list would indicate the removal of all items).
+        """
+        if self._has_values_endpoint():
+            url = f"{base_path}/values/id?sort_key=id"
+            root_key, key = "values", None
+        else:
+            # older beets versions: extract the IDs from all datasets
+            url = f"{base_path}/query/id+"
+            root_key, key = "results", "id"
+        result = self._get(url)
+        if result is None:
+            msg = f"Failed to retrieve the IDs of {base_path}"
+            raise BeetsRequestError(msg)
+        values = result[root_key]
+        return values if key is None else [dataset[key] for dataset in values]
+
+    def get_datasets_modified_since(self, base_path, field, timestamp):
+        """returns the datasets with a date field (e.g. 'mtime') not before
+        the given timestamp (seconds since epoch)
+
+        The beets API accepts only dates with a precision of seconds in the
+        local time of the server.  Its UTC offset is determined via the latest
+        dataset delivered by the previous query.  Until then, the query starts
+        earlier (see 'MODIFICATION_QUERY_MARGIN').  Thus some datasets may be
+        returned, although they were not modified after the given timestamp.
+        """
+        reference_id = self._time_references.get((base_path, field))
+        utc_offset = None
+        if reference_id is not None:
+            utc_offset = self._get_server_utc_offset(base_path, field, reference_id)
+        if utc_offset is None:
+            server_time = time.localtime(int(timestamp) - MODIFICATION_QUERY_MARGIN)
+        else:
+            server_time = time.gmtime(int(timestamp) + utc_offset)
+        query = _format_date_query(field, server_time)
+        datasets = list(self._get_results(f"{base_path}/query/{query}"))
+        dated_datasets = [dataset for dataset in datasets if dataset.get(field)]
+        if dated_datasets:
+            latest = max(dated_datasets, key=lambda dataset: dataset[field])
+            self._time_references[(base_path, field)] = latest["id"]
+        return datasets
+
+    def _get_server_utc_offset(self, base_path, field, reference_id):
+        """returns the UTC offset of the beets server in seconds (or None)
+
+        A query for the date field of the reference dataset matches, if the
+        date is interpreted with an offset not beyond the server's offset.
+        The previous offset is verified with two queries.  Otherwise, it is
+        determined via a binary search among all possible offsets.
+        """
+        datasets = list(self._get_results(f"{base_path}/query/id:{reference_id}"))
+        if not datasets or not datasets[0].get(field):
+            # the dataset was removed in the meantime
+            return None
+        seconds = int(datasets[0][field])
+
+        def matches(utc_offset):
+            query = _format_date_query(field, time.gmtime(seconds + utc_offset))
+            url = f"{base_path}/query/id:{reference_id}/{query}"
+            return bool(list(self._get_results(url)))
+
+        utc_offset = self._server_utc_offset
+        if (
+            utc_offset is not None
+            and matches(utc_offset)
+            and not matches(utc_offset + UTC_OFFSET_STEP)
+        ):
+            return utc_offset
+        low, high = 0, len(UTC_OFFSETS) - 1
+        if not matches(UTC_OFFSETS[low]):
+            return None
+        while low < high:
+            middle = (low + high + 1) // 2
+            if matches(UTC_OFFSETS[middle]):
+                low = middle
+            else:
+                high = middle - 1
+        self._server_utc_offset = UTC_OFFSETS[low]
+        logger.debug(f"Beets - UTC offset of the server: {UTC_OFFSETS[low]}s")
+        return self._server_utc_offset
+
+    def get_datasets_by_ids(self, base_path, root_key, ids):
+        """returns the datasets of the given items or albums"""
+        return self.get_remote_datasets_by_ids(base_path, root_key, ids)
+
+    def get_remote_datasets_by_ids(self, base_path, root_key, ids):
+        """request the datasets of items or albums from the beets web API
+
+        The IDs are split into chunks - each resulting in one request.
+        """
+        ids = list(ids)
+        chunks = [
+            ids[index : index + self.id_chunk_size]
+            for index in range(0, len(ids), self.id_chunk_size)
+        ]
+        datasets = []
+        for chunk_datasets in self.map_concurrently(
+            lambda chunk: self._get_by_ids(base_path, root_key, chunk), chunks
+        ):
+            datasets.extend(chunk_datasets)
+        return datasets
+
+    def _get_by_ids(self, base_path, root_key, ids):
+        """retrieve the datasets of multiple items or albums in one request"""
+        id_list = ",".join(str(item_id) for item_id in ids)
+        result = self._get(f"{base_path}/{id_list}")
+        if not result:
+            return []
+        if root_key in result:
+            return result[root_key]
+        # the beets API delivers a single object (instead of a list), if only
+        # one of the requested IDs exists
+        return [result]
+
+    def _parse_album(self, dataset):
+        """parse an album and share it with equal albums parsed before"""
+        album = parse_album(dataset, self, self.known_artists)
+        known_album = self.known_albums.get(dataset["id"])
+        if known_album == album:
+            return known_album
+        # the album is new or it was modified
+        self.known_albums[dataset["id"]] = album
+        return album
 
     def _parse_multiple_albums(self, album_datasets):
         albums = []
         for dataset in album_datasets or []:
             try:
-                albums.append(parse_album(dataset, self))
+                albums.append(self._parse_album(dataset))
             except (ValueError, KeyError) as exc:
                 logger.info(f"Beets - Failed to parse album data: {exc}")
         return [album for album in albums if album]
 
-    def _parse_multiple_tracks(self, track_datasets):
-        tracks = []
-        for dataset in track_datasets or []:
+    def _parse_multiple(self, datasets, parse, label):
+        results = []
+        for dataset in datasets:
             try:
-                tracks.append(parse_track(dataset, self))
+                results.append(parse(dataset))
             except (ValueError, KeyError) as exc:
-                logger.info(f"Beets - Failed to parse track data: {exc}")
-        return [track for track in tracks if track]
+                logger.info(f"Beets - Failed to parse {label} data: {exc}")
+        return results
+
+    def _parse_multiple_tracks(self, track_datasets):
+        return [track for _, track in self._iterate_parsed_tracks(track_datasets)]
+
+    def _iterate_parsed_tracks(self, track_datasets):
+        """generate pairs of datasets and their successfully parsed tracks
+
+        The datasets are processed in batches: the referenced albums of each
+        batch are retrieved at once instead of one by one.  Thus only a batch
+        of datasets is kept in memory, if they are delivered by an iterator.
+        """
+        for batch in itertools.batched(
+            track_datasets or [], PARSE_BATCH_SIZE, strict=False
+        ):
+            albums = self.get_albums_by_ids(
+                dataset["album_id"] for dataset in batch if dataset.get("album_id")
+            )
+            for dataset in batch:
+                try:
+                    track = parse_track(
+                        dataset, self, albums=albums, known_artists=self.known_artists
+                    )
+                except (ValueError, KeyError) as exc:
+                    logger.info(f"Beets - Failed to parse track data: {exc}")
+                else:
+                    if track:
+                        yield dataset, track
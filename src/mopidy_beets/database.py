@@ -0,0 +1,209 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from mopidy_beets.cache import cache
+from mopidy_beets.client import BeetsRemoteClient
+from mopidy_beets.resilience import BeetsRequestError
+from mopidy_beets.sql import TABLES, SQLiteLibrary, validate_field_name
+
+logger = logging.getLogger(__name__)
+
+# the tables of the flexible attributes (not stored as columns) of each table
+ATTRIBUTE_TABLES = {"items": "item_attributes", "albums": "album_attributes"}
+
+# columns not delivered by the beets web API (local paths)
+HIDDEN_COLUMNS = {"items": ("path",), "albums": ("artpath",)}
+
+# fields containing lists, which are stored as delimited strings by beets
+MULTI_VALUE_FIELDS = frozenset(
+    (
+        "albumartists",
+        "albumartists_credit",
+        "albumartists_sort",
+        "albumtypes",
+        "artists",
+        "artists_credit",
+        "artists_ids",
+        "artists_sort",
+        "mb_albumartistids",
+        "mb_artistids",
+    )
+)
+MULTI_VALUE_DELIMITER = "\\\u2400"
+
+
+class BeetsDatabase(SQLiteLibrary):
+    """Read-only access to the SQLite database of a beets library
+
+    The datasets resemble the datasets delivered by the beets web API:
+    fixed fields (columns) and flexible attributes are combined, local paths
+    are omitted and multi-value fields (e.g. 'artists') are split into lists.
+    """
+
+    def __init__(self, path):
+        uri = Path(path).resolve().as_uri() + "?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        connection.execute("PRAGMA query_only = 1")
+        super().__init__(connection)
+        self._columns = {
+            table: [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+            for table in ATTRIBUTE_TABLES
+        }
+
+    def _field_expression(self, table, field):
+        validate_field_name(field)
+        if field in self._columns[table]:
+            return f"{table}.{field}"
+        return (
+            f"(SELECT value FROM {ATTRIBUTE_TABLES[table]} "  # noqa: S608
+            f"WHERE entity_id = {table}.id AND key = '{field}')"
+        )
+
+    def _select_datasets(self, table, condition, parameters, order):
+        columns = self._columns[table]
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT * FROM {table} WHERE {condition} ORDER BY {order}",  # noqa: S608
+                parameters,
+            ).fetchall()
+            datasets = {}
+            for row in rows:
+                dataset = dict(zip(columns, row, strict=True))
+                for column in HIDDEN_COLUMNS[table]:
+                    dataset.pop(column, None)
+                datasets[dataset["id"]] = dataset
+            # add the flexible attributes
+            for entity_id, key, value in self._connection.execute(
+                f"SELECT entity_id, key, value FROM {ATTRIBUTE_TABLES[table]} "  # noqa: S608
+                "WHERE entity_id IN (SELECT value FROM json_each(?))",
+                [json.dumps(list(datasets))],
+            ):
+                datasets[entity_id][key] = value
+        for dataset in datasets.values():
+            for key, value in dataset.items():
+                if key in MULTI_VALUE_FIELDS and isinstance(value, str):
+                    dataset[key] = value.split(MULTI_VALUE_DELIMITER) if value else []
+                elif isinstance(value, bytes):
+                    # the beets web API delivers binary values base64 encoded
+                    dataset[key] = base64.b64encode(value).decode("ascii")
+        return list(datasets.values())
+
+    def get_item_path(self, item_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT path FROM items WHERE id = ?", (item_id,)
+            ).fetchone()
+        return os.fsdecode(row[0]) if row and row[0] else None
+
+    def has_album_art(self, album_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT artpath FROM albums WHERE id = ?", (album_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+
+class BeetsDatabaseClient(BeetsRemoteClient):
+    """Serve library queries directly from the database of a beets library
+
+    This requires read access to the 'library.db' file of beets (e.g. if
+    beets runs on the same host).  Only the audio files and the album art are
+    still delivered by the beets web API.
+    """
+
+    def __init__(self, database_path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._database_path = database_path
+        self._database_lock = threading.Lock()
+        # opened on first use, if it is not accessible yet
+        self.database = None
+        try:
+            self._get_database()
+        except BeetsRequestError as exc:
+            logger.error(f"Beets - {exc}")  # noqa: TRY400
+
+    def _get_database(self):
+        with self._database_lock:
+            if self.database is None:
+                try:
+                    self.database = BeetsDatabase(self._database_path)
+                except sqlite3.Error as exc:
+                    msg = f"Failed to open the database {self._database_path}: {exc}"
+                    raise BeetsRequestError(msg) from exc
+                logger.info(
+                    "Reading the Beets library database %s", self._database_path
+                )
+            return self.database
+
+    def _read(self, method, *args):
+        """call a method of the database
+
+        Database errors (e.g. a locked database or an unknown schema) are
+        raised as BeetsRequestError, like failed requests of the remote client.
+        """
+        database = self._get_database()
+        try:
+            return method(database, *args)
+        except sqlite3.Error as exc:
+            msg = f"Failed to read the database {self._database_path}: {exc}"
+            raise BeetsRequestError(msg) from exc
+
+    def stop(self):
+        with self._database_lock:
+            if self.database is not None:
+                self.database.close()
+        super().stop()
+
+    def get_ids(self, base_path):
+        return sorted(self._read(BeetsDatabase.get_ids, TABLES[base_path]))
+
+    def get_datasets_modified_since(self, base_path, field, timestamp):
+        return self._read(
+            BeetsDatabase.get_modified_since, TABLES[base_path], field, timestamp
+        )
+
+    def get_datasets_by_ids(self, base_path, root_key, ids):  # noqa: ARG002
+        return self._read(BeetsDatabase.get_by_ids, TABLES[base_path], ids)
+
+    def get_remote_datasets_by_ids(self, base_path, root_key, ids):
+        return self.get_datasets_by_ids(base_path, root_key, ids)
+
+    def _get_objects_by_attribute(self, base_path, attributes, exact_text, sort_fields):
+        return self._read(
+            BeetsDatabase.query, TABLES[base_path], attributes, exact_text, sort_fields
+        )
+
+    def _get_unique_attribute_values(self, base_url, field, sort_field):
+        return self._read(
+            BeetsDatabase.get_unique_values, TABLES[base_url], field, sort_field
+        )
+
+    @cache(max_size=1, fallback=list)
+    def get_artists(self):
+        """returns all album artists (like the beets web API)"""
+        return sorted(
+            name
+            for name in self._read(
+                BeetsDatabase.get_unique_values, "albums", "albumartist", "albumartist"
+            )
+            if name
+        )
+
+    def get_track_path(self, track_id):
+        try:
+            return self._read(BeetsDatabase.get_item_path, track_id)
+        except BeetsRequestError as exc:
+            logger.info(f"Beets - Failed to determine the path of a track: {exc}")
+            return None
+
+    def _probe_album_art(self, album_id):
+        try:
+            return self._read(BeetsDatabase.has_album_art, album_id)
+        except BeetsRequestError as exc:
+            logger.info(f"Beets - Failed to check album art: {exc}")
+            return None
@@ -11,6 +11,7 @@ from mopidy_beets.browsers.albums import (
     AlbumsByGenreBrowser,
     AlbumsByYearBrowser,
 )
+from mopidy_beets.prefetch import BrowsePrefetcher
 from mopidy_beets.translator import assemble_uri, parse_uri
 
 logger = logging.getLogger(__name__)
@@ -21,18 +22,47 @@ DATE_REGEX = re.compile(
     r"^(?P<year>\d{4})(?:[-/](?P<month>\d{1,2})(?:[-/](?P<day>\d{1,2}))?)?$"
 )
 
+# the beets fields corresponding to the fields supported by 'get_distinct'
+DISTINCT_FIELDS = {
+    # Mopidy core passes "track_name" as "track"
+    "track": "title",
+    "track_name": "title",
+    "album": "album",
+    "artist": "artist",
+    "albumartist": "albumartist",
+    "composer": "composer",
+    "track_no": "track",
+    "genre": "genre",
+    "date": "year",
+    "comment": "comments",
+    "disc_no": "disc",
+    "musicbrainz_albumid": "mb_albumid",
+    "musicbrainz_artistid": "mb_artistid",
+    "musicbrainz_trackid": "mb_trackid",
+}
+
 
 class BeetsLibraryProvider(backend.LibraryProvider):
-    root_directory = models.Ref.directory(uri="beets:library", name="Beets library")
+    root_directory: models.Ref = models.Ref.directory(  # pyright: ignore[reportIncompatibleVariableOverride]
+        uri="beets:library", name="Beets library"
+    )
     root_categorie_list: ClassVar[list[tuple[str, str, type[GenericBrowserBase]]]] = [
         ("albums-by-artist", "Albums by Artist", AlbumsByArtistBrowser),
         ("albums-by-genre", "Albums by Genre", AlbumsByGenreBrowser),
         ("albums-by-year", "Albums by Year", AlbumsByYearBrowser),
     ]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self, *args, search_limit=0, browse_prefetch=0, prefetch_workers=1, **kwargs
+    ):
         super().__init__(*args, **kwargs)
         self.remote = self.backend.beets_api
+        # maximum number of tracks returned by a search (zero: unlimited)
+        self.search_limit = search_limit
+        # number of listed albums prefetched after browsing (zero: disabled)
+        self.browse_prefetch = browse_prefetch
+        self.prefetcher = BrowsePrefetcher(self._browse, max_workers=prefetch_workers)
+        self._album_uri_prefix = assemble_uri(self.root_directory.uri, "album") + ";"
         self.category_browsers = []
         for key, label, browser_class in self.root_categorie_list:
             ref = models.Ref.directory(
@@ -41,7 +71,18 @@ class BeetsLibraryProvider(backend.LibraryProvider):
             browser = browser_class(ref, self.remote)
             self.category_browsers.append(browser)
 
-    def browse(self, uri):  # noqa: PLR0911
+    def browse(self, uri):
+        if not self.browse_prefetch:
+            return self._browse(uri)
+        if uri.startswith(self._album_uri_prefix):
+            self.prefetcher.register_browse(uri)
+        refs = self._browse(uri)
+        # the user will probably open one of the listed albums next
+        album_uris = [ref.uri for ref in refs if ref.type == models.Ref.ALBUM]
+        self.prefetcher.prefetch(album_uris[: self.browse_prefetch])
+        return refs
+
+    def _browse(self, uri):  # noqa: PLR0911
         logger.debug("Browsing Beets at: %s", uri)
         path, item_id = parse_uri(uri, uri_prefix=self.root_directory.uri)
         if path is None:
@@ -59,14 +100,11 @@ class BeetsLibraryProvider(backend.LibraryProvider):
             except ValueError:
                 logger.error(f"Beets - invalid album ID in URI: {uri}")  # noqa: TRY400
                 return []
-            tracks = self.remote.get_tracks_by(
+            return self.remote.get_track_refs_by(
                 [("album_id", album_id)],
                 True,  # noqa: FBT003
                 ["track+"],
             )
-            return [
-                models.Ref.track(uri=track.uri, name=track.name) for track in tracks
-            ]
         # show a generic category directory
         for browser in self.category_browsers:
             if (
@@ -79,10 +117,36 @@ class BeetsLibraryProvider(backend.LibraryProvider):
         logger.error("Beets - Invalid browse URI: %s / %s", uri, path)
         return []
 
-    def search(self, query=None, uris=None, exact=False):  # noqa: C901, FBT002, PLR0912
+    def search(self, query=None, uris=None, exact=False):  # noqa: FBT002
         # TODO: restrict the result to 'uris'
         logger.debug('Beets Query (exact=%s) within "%s": %s', exact, uris, query)
         self._validate_query(query)
+        search_list = self._get_search_list(query)
+        logger.debug("Beets search query: %s", search_list)
+        if self.search_limit:
+            tracks, next_offset = self.remote.get_tracks_page(
+                search_list, exact, [], self.search_limit
+            )
+            if next_offset is not None:
+                logger.debug(
+                    "Beets search: result limited to %d tracks", self.search_limit
+                )
+        else:
+            tracks = self.remote.get_tracks_by(search_list, exact, [])
+        uri = "-".join(
+            [
+                item if isinstance(item, str) else "=".join(map(str, item))
+                for item in search_list
+            ]
+        )
+        return SearchResult(uri="beets:search-" + uri, tracks=tracks)
+
+    def _get_search_list(self, query):  # noqa: C901, PLR0912
+        """translate a mopidy query into beets attributes
+
+        Strings (from the field "any") match any attribute.  Other fields are
+        translated into pairs of beets field names and values.
+        """
         search_list = []
         for field, values in query.items():
             for val in values:
@@ -124,58 +188,131 @@ class BeetsLibraryProvider(backend.LibraryProvider):
                 else:
                     logger.info("Beets: ignoring unknown query key: %s", field)
                     break
-        logger.debug("Beets search query: %s", search_list)
-        tracks = self.remote.get_tracks_by(search_list, exact, [])
-        uri = "-".join(
-            [
-                item if isinstance(item, str) else "=".join(map(str, item))
-                for item in search_list
-            ]
-        )
-        return SearchResult(uri="beets:search-" + uri, tracks=tracks)
+        return search_list
 
     def lookup(self, uri=None, uris=None):
         logger.debug("Beets lookup: %s", uri or uris)
         if uri:
             # the older method (mopidy < 1.0): return a list of tracks
-            # handle one or more tracks given with multiple semicolons
-            logger.debug("Beets lookup: %s", uri)
-            path, item_id = parse_uri(uri, uri_prefix=self.root_directory.uri)
-            if path == "track":
-                tracks = [self.remote.get_track(item_id)]
-            elif path == "album":
-                tracks = self.remote.get_tracks_by(
-                    [("album_id", item_id)],
-                    True,  # noqa: FBT003
-                    ("disc+", "track+"),
-                )
-            elif path == "artist":
-                artist_tracks = self.remote.get_tracks_by(
-                    [("artist", item_id)],
-                    True,  # noqa: FBT003
-                    [],
-                )
-                composer_tracks = self.remote.get_tracks_by(
-                    [("composer", item_id)],
-                    True,  # noqa: FBT003
-                    [],
-                )
-                # Append composer tracks to the artist tracks (unique items).
-                tracks = list(set(artist_tracks + composer_tracks))
-                tracks.sort(
-                    key=lambda t: (t.date or 0, t.disc_no or 0, t.track_no or 0)
-                )
+            return self.lookup_many([uri])[uri]
+        # the newer method (mopidy>=1.0): return a dict of uris and tracks
+        return self.lookup_many(uris or [])
+
+    def lookup_many(self, uris):
+        """return a dict of uris and their tracks
+
+        Tracks, albums and artists are retrieved in bulk - each with as few
+        requests as possible.
+        """
+        uris = list(uris)
+        parsed_uris = {
+            uri: parse_uri(uri, uri_prefix=self.root_directory.uri) for uri in uris
+        }
+        wanted_ids = {"track": set(), "album": set(), "artist": set()}
+        for path, item_id in parsed_uris.values():
+            if path in wanted_ids:
+                wanted_ids[path].add(item_id)
+        # The lookups run on the calling thread: only there the chunks of the
+        # track lookup are retrieved concurrently (see 'map_concurrently').
+        tracks_by_id = self.remote.get_tracks_by_ids(sorted(wanted_ids["track"]))
+        found_tracks = {
+            "track": {track_id: [track] for track_id, track in tracks_by_id.items()},
+            "album": self._lookup_albums(wanted_ids["album"]),
+            "artist": self._lookup_artists(wanted_ids["artist"]),
+        }
+        result = {}
+        for uri in uris:
+            path, item_id = parsed_uris[uri]
+            if path in found_tracks:
+                result[uri] = found_tracks[path].get(item_id, [])
             else:
                 logger.info("Unknown Beets lookup URI: %s", uri)
-                tracks = []
-            # remove occourences of None
-            return [track for track in tracks if track]
-        # the newer method (mopidy>=1.0): return a dict of uris and tracks
-        return {uri: self.lookup(uri=uri) for uri in uris}
+                result[uri] = []
+        return result
+
+    def _lookup_albums(self, album_ids):
+        """return the tracks of the given albums (indexed by album ID)"""
+        if not album_ids:
+            return {}
+        tracks = self.remote.get_tracks_by(
+            [("album_id", tuple(sorted(album_ids)))],
+            True,  # noqa: FBT003
+            ("disc+", "track+"),
+        )
+        tracks_by_album = {}
+        for track in tracks:
+            if track.album:
+                _, album_id = parse_uri(track.album.uri)
+                tracks_by_album.setdefault(album_id, []).append(track)
+        return tracks_by_album
+
+    def _lookup_artists(self, names):
+        """return the tracks of the given artists or composers (indexed by name)"""
+        if not names:
+            return {}
+        names = tuple(sorted(names))
+        artist_tracks, composer_tracks = self.remote.map_concurrently(
+            lambda field: self.remote.get_tracks_by(
+                [(field, names)],
+                True,  # noqa: FBT003
+                [],
+            ),
+            ("artist", "composer"),
+        )
+        tracks_by_artist = {}
+        for track in artist_tracks:
+            for artist in track.artists:
+                tracks_by_artist.setdefault(artist.name, set()).add(track)
+        # Append composer tracks to the artist tracks (unique items).
+        for track in composer_tracks:
+            for composer in track.composers:
+                tracks_by_artist.setdefault(composer.name, set()).add(track)
+        return {
+            name: sorted(
+                tracks, key=lambda t: (t.date or 0, t.disc_no or 0, t.track_no or 0)
+            )
+            for name, tracks in tracks_by_artist.items()
+        }
+
+    def get_images(self, uris):
+        """return the album art images of tracks and albums"""
+        album_ids = {}
+        track_ids = {}
+        for uri in uris:
+            path, item_id = parse_uri(uri, uri_prefix=self.root_directory.uri)
+            if path == "album":
+                album_ids[uri] = item_id
+            elif path == "track":
+                track_ids[uri] = item_id
+        tracks = self.remote.get_tracks_by_ids(track_ids.values())
+        for uri, track_id in track_ids.items():
+            track = tracks.get(track_id)
+            if track and track.album:
+                album_ids[uri] = parse_uri(track.album.uri)[1]
+        art_urls = self.remote.get_album_art_urls(album_ids.values())
+        return {
+            uri: [models.Image(uri=art_urls[album_id])] if art_urls[album_id] else []
+            for uri, album_id in album_ids.items()
+        }
 
     def get_distinct(self, field, query=None):
-        logger.debug("Beets distinct query: %s (uri=%s)", field, query)
-        return self.remote.get_sorted_unique_track_attributes(field)
+        logger.debug("Beets distinct query: %s (query=%s)", field, query)
+        beets_field = DISTINCT_FIELDS.get(field)
+        if beets_field is None:
+            logger.info("Beets: unsupported distinct field: %s", field)
+            return set()
+        if query:
+            # the query is translated just like for an exact search
+            self._validate_query(query)
+            values = self.remote.get_unique_track_attributes_by(
+                beets_field, self._get_search_list(query)
+            )
+        else:
+            values = self.remote.get_sorted_unique_track_attributes(beets_field)
+        if field == "date":
+            # beets stores unknown years as zero
+            return {str(value) for value in values if value}
+        return {value for value in values if value not in ("", None)}
 
     def _validate_query(self, query):
         for values in query.values():
@@ -0,0 +1,56 @@
+import itertools
+
+# number of query results filtered together (see 'filter_exact_matches')
+FILTER_BATCH_SIZE = 1000
+
+# Beyond this number of search terms, the text attributes of an item are
+# collected in a set instead of scanning the attributes for every term.
+VALUE_SET_MIN_TERMS = 4
+
+
+def filter_exact_matches(items, exact_query_list):
+    """verify that text attributes do not just test 'is in', but match equality
+
+    'exact_query_list' consists of key/value pairs.  A key of 'None' requires
+    the value (a string) to match one of the item attributes.
+    The items are filtered in batches (they may be delivered by an iterator).
+    The conditions for specific fields are applied first, since they are cheap
+    and selective.  Every condition is applied only to the items, which
+    passed the previous conditions.
+    """
+    field_values = {}
+    terms = {}
+    for key, value in exact_query_list:
+        if key is None:
+            terms[value] = True
+        else:
+            field_values.setdefault(key, set()).add(value)
+    terms = tuple(terms)
+    other_terms = frozenset(terms[1:])
+    for batch in itertools.batched(items, FILTER_BATCH_SIZE, strict=False):
+        matches = batch
+        for key, values in field_values.items():
+            # filtering is necessary only for text based attributes
+            if not matches or not isinstance(matches[0][key], str):
+                continue
+            if len(values) > 1:
+                # a text attribute cannot be equal to different values
+                matches = []
+                break
+            (value,) = values
+            matches = [item for item in matches if item[key] == value]
+        if len(terms) < VALUE_SET_MIN_TERMS:
+            for term in terms:
+                matches = [item for item in matches if term in item.values()]
+        else:
+            # The first term rejects most items.  The other terms are looked up
+            # at once: every attribute is inspected only once.
+            matches = [item for item in matches if terms[0] in item.values()]
+            matches = [
+                item
+                for item in matches
+                if other_terms.issubset(
+                    {value for value in item.values() if isinstance(value, str)}
+                )
+            ]
+        yield from matches
@@ -0,0 +1,254 @@
+import bisect
+import logging
+import math
+import re
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (in seconds) of the buckets of the latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+# Requests are grouped by the pattern of their path.  IDs and query terms
+# are removed, e.g. "/album/1,2,3" -> "/album/{id}".
+ENDPOINT_PATTERNS = (
+    (re.compile(r"^/(item|album)/query/"), r"/\1/query"),
+    (re.compile(r"^/(item|album)/values/"), r"/\1/values"),
+    (re.compile(r"^/(item|album)/[\d,]+/(\w+)"), r"/\1/{id}/\2"),
+    (re.compile(r"^/(item|album)/[\d,]+"), r"/\1/{id}"),
+)
+
+
+def get_endpoint_pattern(path):
+    """return the pattern of a request path (relative to the API endpoint)"""
+    path = path.split("?", 1)[0]
+    for regex, replacement in ENDPOINT_PATTERNS:
+        match = regex.match(path)
+        if match:
+            return match.expand(replacement)
+    return path.rstrip("/") or "/"
+
+
+class RequestMetrics:
+    """Collect statistics of the requests sent to the beets web API
+
+    The statistics are grouped by endpoint patterns (see
+    'get_endpoint_pattern'): the number of requests and failures, a
+    histogram of their latencies, the number of bytes received and the time
+    spent on parsing the JSON responses.
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _get_endpoint(self, path):
+        pattern = get_endpoint_pattern(path)
+        try:
+            return self._endpoints[pattern]
+        except KeyError:
+            endpoint = {
+                "requests": 0,
+                "failures": 0,
+                "latency_sum": 0.0,
+                "latency_buckets": [0] * len(LATENCY_BUCKETS),
+                "bytes": 0,
+                "parse_seconds": 0.0,
+            }
+            self._endpoints[pattern] = endpoint
+            return endpoint
+
+    def record_request(self, path, duration, *, failed=False):
+        with self._lock:
+            endpoint = self._get_endpoint(path)
+            endpoint["requests"] += 1
+            if failed:
+                endpoint["failures"] += 1
+            endpoint["latency_sum"] += duration
+            endpoint["latency_buckets"][
+                bisect.bisect_left(LATENCY_BUCKETS, duration)
+            ] += 1
+
+    def record_received(self, path, size):
+        with self._lock:
+            self._get_endpoint(path)["bytes"] += size
+
+    def record_parsing(self, path, duration):
+        with self._lock:
+            self._get_endpoint(path)["parse_seconds"] += duration
+
+    def get_statistics(self):
+        """return the statistics indexed by endpoint patterns
+
+        The latency histogram ('latency_buckets') maps the upper bound of
+        every bucket to the number of requests not exceeding it.
+        """
+        result = {}
+        with self._lock:
+            for pattern, endpoint in self._endpoints.items():
+                statistics = dict(endpoint)
+                cumulative_counts = []
+                count = 0
+                for bucket_count in endpoint["latency_buckets"]:
+                    count += bucket_count
+                    cumulative_counts.append(count)
+                statistics["latency_buckets"] = dict(
+                    zip(LATENCY_BUCKETS, cumulative_counts, strict=True)
+                )
+                result[pattern] = statistics
+        return result
+
+
+def _get_hit_ratio(cache_statistics):
+    lookups = cache_statistics["hits"] + cache_statistics["misses"]
+    return cache_statistics["hits"] / lookups if lookups else 0.0
+
+
+def format_summary(request_statistics, cache_statistics):
+    """return a human readable summary (one line per endpoint and cache)"""
+    lines = []
+    for pattern, statistics in sorted(request_statistics.items()):
+        count = statistics["requests"]
+        average = statistics["latency_sum"] / count if count else 0
+        lines.append(
+            f"{pattern}: {count} requests ({statistics['failures']} failed), "
+            f"{average * 1000:.0f} ms average, "
+            f"{statistics['bytes'] / 1024:.0f} KiB received, "
+            f"{statistics['parse_seconds'] * 1000:.0f} ms parsing"
+        )
+    for name, statistics in sorted(cache_statistics.items()):
+        lines.append(
+            f"cache {name}: {statistics['size']} entries, "
+            f"{_get_hit_ratio(statistics):.0%} hits"
+        )
+    return "\n".join(lines)
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == math.inf else str(bound)
+
+
+def format_prometheus(request_statistics, cache_statistics):
+    """return the statistics in the Prometheus text exposition format"""
+    lines = []
+
+    def add_metric(name, metric_type, description, samples):
+        lines.append(f"# HELP mopidy_beets_{name} {description}")
+        lines.append(f"# TYPE mopidy_beets_{name} {metric_type}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{label}="{text}"' for label, text in labels)
+            lines.append(f"mopidy_beets_{name}{suffix}{{{label_text}}} {value}")
+
+    endpoints = sorted(request_statistics.items())
+
+    def get_endpoint_samples(key):
+        return [("", [("endpoint", pattern)], stat[key]) for pattern, stat in endpoints]
+
+    add_metric(
+        "requests_total",
+        "counter",
+        "Requests sent to the beets web API",
+        get_endpoint_samples("requests"),
+    )
+    add_metric(
+        "request_failures_total",
+        "counter",
+        "Failed requests (connection problems or server errors)",
+        get_endpoint_samples("failures"),
+    )
+    latency_samples = []
+    for pattern, statistics in endpoints:
+        for bound, count in statistics["latency_buckets"].items():
+            labels = [("endpoint", pattern), ("le", _format_bound(bound))]
+            latency_samples.append(("_bucket", labels, count))
+        labels = [("endpoint", pattern)]
+        latency_samples.append(("_sum", labels, statistics["latency_sum"]))
+        latency_samples.append(("_count", labels, statistics["requests"]))
+    add_metric(
+        "request_duration_seconds",
+        "histogram",
+        "Time until the response was received",
+        latency_samples,
+    )
+    add_metric(
+        "received_bytes_total",
+        "counter",
+        "Size of the received responses (after decompression)",
+        get_endpoint_samples("bytes"),
+    )
+    add_metric(
+        "parse_seconds_total",
+        "counter",
+        "Time spent on parsing JSON responses",
+        get_endpoint_samples("parse_seconds"),
+    )
+    caches = sorted(cache_statistics.items())
+    for key in ("hits", "misses"):
+        add_metric(
+            f"cache_{key}_total",
+            "counter",
+            f"Cache {key}",
+            [("", [("cache", name)], stat[key]) for name, stat in caches],
+        )
+    add_metric(
+        "cache_hit_ratio",
+        "gauge",
+        "Ratio of cache lookups delivering a fresh value",
+        [("", [("cache", name)], _get_hit_ratio(stat)) for name, stat in caches],
+    )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsReporter:
+    """Log a summary of the request and cache statistics periodically
+
+    Optionally the statistics are also written to a file in the Prometheus
+    text format (e.g. for the "textfile" collector of the node exporter).
+    """
+
+    def __init__(self, get_statistics, interval, path=None):
+        # the function delivering the request and the cache statistics
+        self._get_statistics = get_statistics
+        self._interval = interval
+        self._path = None if path is None else Path(path)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._report_loop, name="BeetsMetrics", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.report()
+
+    def _report_loop(self):
+        while not self._stop_event.wait(self._interval):
+            self.report()
+
+    def report(self):
+        request_statistics, cache_statistics = self._get_statistics()
+        if request_statistics:
+            logger.info(
+                "Beets - request statistics:\n%s",
+                format_summary(request_statistics, cache_statistics),
+            )
+        if self._path is not None:
+            # replace the file at once: readers never see incomplete content
+            temporary_path = self._path.with_name(self._path.name + ".tmp")
+            try:
+                temporary_path.write_text(
+                    format_prometheus(request_statistics, cache_statistics)
+                )
+                temporary_path.replace(self._path)
+            except OSError as exc:
+                logger.warning(
+                    f"Beets - Failed to write metrics to {self._path}: {exc}"
+                )
@@ -0,0 +1,222 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from mopidy_beets.client import BeetsRemoteClient
+from mopidy_beets.sql import TABLES, SQLiteLibrary, validate_field_name
+from mopidy_beets.sync import MODIFICATION_FIELDS, ItemSynchronizer
+
+logger = logging.getLogger(__name__)
+
+# Increase this number whenever the layout of the database changes.
+# Outdated mirrors are discarded.
+SCHEMA_VERSION = 1
+
+# fields used for browsing and lookups
+INDEXED_FIELDS = {
+    "items": ("album_id", "artist", "albumartist", "composer", "genre", "year"),
+    "albums": ("albumartist", "genre", "year"),
+}
+
+
+def _field_expression(field):
+    """return the SQL expression for accessing a field of a stored dataset"""
+    return f"json_extract(data, '$.{validate_field_name(field)}')"
+
+
+class LibraryMirror(SQLiteLibrary):
+    """Local copy of the item and album datasets of a beets library
+
+    The datasets (as delivered by the beets web API) are stored as JSON in an
+    SQLite database.  Fields used for browsing are indexed.
+    """
+
+    def __init__(self, path):
+        super().__init__(sqlite3.connect(path, check_same_thread=False))
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._connection as connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # the mirror is just a copy - simply discard outdated data
+                for table in ("items", "albums", "state"):
+                    connection.execute(f"DROP TABLE IF EXISTS {table}")
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            for table, fields in INDEXED_FIELDS.items():
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    "(id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+                )
+                for field in fields:
+                    connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{field} "
+                        f"ON {table} ({_field_expression(field)})"
+                    )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value)"
+            )
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM state WHERE key = ?", (key,)
+            ).fetchone()
+        return default if row is None else row[0]
+
+    def set_state(self, key, value):
+        with self._lock, self._connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def store(self, table, datasets):
+        with self._lock, self._connection as connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)",  # noqa: S608
+                ((dataset["id"], json.dumps(dataset)) for dataset in datasets),
+            )
+
+    def delete(self, table, ids):
+        with self._lock, self._connection as connection:
+            connection.executemany(
+                f"DELETE FROM {table} WHERE id = ?",  # noqa: S608
+                ((item_id,) for item_id in ids),
+            )
+
+    def _field_expression(self, table, field):  # noqa: ARG002
+        return _field_expression(field)
+
+    def _select_datasets(self, table, condition, parameters, order):
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT data FROM {table} WHERE {condition} ORDER BY {order}",  # noqa: S608
+                parameters,
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class BeetsMirrorClient(BeetsRemoteClient):
+    """Serve library queries from a local mirror of the beets library
+
+    The mirror is updated in the background periodically.  Only datasets
+    added or modified (based on the 'added' and 'mtime' fields) since the
+    previous update are retrieved.
+    Queries are delegated to the beets web API until the first update is
+    finished.
+    """
+
+    def __init__(self, mirror_path, *args, refresh_interval=600, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mirror = LibraryMirror(mirror_path)
+        self._is_ready = self.mirror.get_state("last_refresh") is not None
+        self._refresh_interval = refresh_interval
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+
+    def start(self):
+        super().start()
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, name="BeetsMirrorRefresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+        self.mirror.close()
+        super().stop()
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(f"Beets - Failed to refresh the library mirror: {exc}")
+            self._stop_event.wait(self._refresh_interval)
+
+    def is_ready(self):
+        """the mirror is usable after its first complete update"""
+        return self._is_ready
+
+    def refresh(self):
+        """update the mirror with the changes of the beets library"""
+        started = time.time()
+        modification_times = {}
+        for field in MODIFICATION_FIELDS:
+            timestamp = self.mirror.get_state(f"max_{field}")
+            if timestamp is not None:
+                modification_times[field] = timestamp
+        synchronizer = ItemSynchronizer(
+            self,
+            self.id_chunk_size * self.max_concurrent_requests,
+            known_ids=self.mirror.get_ids("items"),
+            modification_times=modification_times,
+        )
+        removed_item_ids, changed_item_chunks = synchronizer.synchronize()
+        self.mirror.delete("items", removed_item_ids)
+        changed_items_count = 0
+        changed_album_ids = set()
+        # Store the changed items in chunks: the initial update may take a
+        # while and it should be continued after an interruption.
+        for datasets in changed_item_chunks:
+            self.mirror.store("items", datasets)
+            changed_items_count += len(datasets)
+            changed_album_ids.update(
+                dataset["album_id"] for dataset in datasets if dataset.get("album_id")
+            )
+            if self._stop_event.is_set():
+                return
+        # retrieve new albums as well as the albums of modified items
+        remote_album_ids = set(self.get_ids("/album"))
+        local_album_ids = self.mirror.get_ids("albums")
+        removed_album_ids = local_album_ids - remote_album_ids
+        changed_album_ids |= remote_album_ids - local_album_ids
+        changed_albums = self.get_remote_datasets_by_ids(
+            "/album", "albums", sorted(changed_album_ids)
+        )
+        self.mirror.delete("albums", removed_album_ids)
+        self.mirror.store("albums", changed_albums)
+        for field, timestamp in synchronizer.modification_times.items():
+            self.mirror.set_state(f"max_{field}", timestamp)
+        self.mirror.set_state("last_refresh", started)
+        self._is_ready = True
+        if (
+            changed_items_count
+            or removed_item_ids
+            or changed_albums
+            or removed_album_ids
+        ):
+            # discard cached results based on outdated data
+            self.caches.clear()
+        logger.info(
+            "Beets - library mirror updated in %.1fs: %d/%d items and %d/%d albums "
+            "changed/removed",
+            time.time() - started,
+            changed_items_count,
+            len(removed_item_ids),
+            len(changed_albums),
+            len(removed_album_ids),
+        )
+
+    def get_datasets_by_ids(self, base_path, root_key, ids):
+        if not self.is_ready():
+            return super().get_datasets_by_ids(base_path, root_key, ids)
+        return self.mirror.get_by_ids(TABLES[base_path], ids)
+
+    def _get_objects_by_attribute(self, base_path, attributes, exact_text, sort_fields):
+        if not self.is_ready():
+            return super()._get_objects_by_attribute(
+                base_path, attributes, exact_text, sort_fields
+            )
+        return self.mirror.query(TABLES[base_path], attributes, exact_text, sort_fields)
+
+    def _get_unique_attribute_values(self, base_url, field, sort_field):
+        if not self.is_ready():
+            return super()._get_unique_attribute_values(base_url, field, sort_field)
+        return self.mirror.get_unique_values(TABLES[base_url], field, sort_field)
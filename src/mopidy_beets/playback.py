@@ -0,0 +1,52 @@
+import logging
+import os
+from pathlib import Path, PurePosixPath
+
+logger = logging.getLogger(__name__)
+
+
+class LocalFileMapper:
+    """Map the paths of beets items to files accessible on the local host
+
+    The music directory of beets may be mounted at a different location on
+    the Mopidy host (e.g. via NFS).  In this case the beets directory prefix
+    is replaced with the local directory.  Without these directories, the
+    paths are used unchanged (beets runs on the same host).
+    """
+
+    def __init__(self, beets_directory=None, local_directory=None):
+        if (beets_directory is None) != (local_directory is None):
+            msg = "The beets and the local music directory need to be combined"
+            raise ValueError(msg)
+        self._beets_directory = (
+            None if beets_directory is None else PurePosixPath(beets_directory)
+        )
+        self._local_directory = (
+            None if local_directory is None else Path(local_directory).resolve()
+        )
+
+    def get_local_path(self, beets_path):
+        """returns the local path of a beets item path (or None if it is not
+        below the beets music directory)
+        """
+        path = PurePosixPath(beets_path)
+        if self._beets_directory is None or self._local_directory is None:
+            return Path(path)
+        if not path.is_relative_to(self._beets_directory):
+            return None
+        return self._local_directory.joinpath(
+            *path.relative_to(self._beets_directory).parts
+        )
+
+    def get_file_uri(self, beets_path):
+        """returns the "file://" URI of a readable local file (or None)"""
+        if not beets_path:
+            return None
+        local_path = self.get_local_path(beets_path)
+        if local_path is None:
+            logger.debug(f"Beets - path outside of the music directory: {beets_path}")
+            return None
+        if not (local_path.is_file() and os.access(local_path, os.R_OK)):
+            logger.debug(f"Beets - local file is not accessible: {local_path}")
+            return None
+        return local_path.as_uri()
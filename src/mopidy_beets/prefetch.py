@@ -0,0 +1,169 @@
+import collections
+import itertools
+import logging
+import queue
+import threading
+
+from mopidy import models
+
+logger = logging.getLogger(__name__)
+
+# Tasks with lower values are processed first.
+STOP_PRIORITY = 0
+PREDICTION_PRIORITY = 5
+WARM_UP_PRIORITY = 10
+
+# maximum number of predicted URIs remembered for the statistics
+MAX_TRACKED_PREDICTIONS = 1024
+
+# states of predicted URIs
+PENDING, DONE, USED = "pending", "done", "used"
+
+# directories containing further directories or tracks
+BROWSABLE_REF_TYPES = (models.Ref.DIRECTORY, models.Ref.ALBUM)
+
+
+class BrowsePrefetcher:
+    """Retrieve browse results in the background in order to fill the caches
+
+    A limited number of worker threads processes the scheduled URIs (ordered
+    by their priority).  The workers are started along with the first task.
+    Failures are ignored: the same request is repeated, when the user browses
+    the URI.
+    The usefulness of predictions (see 'prefetch') is measured by comparing
+    them with the URIs browsed by the user (see 'register_browse').
+    """
+
+    def __init__(self, browse, max_workers=1):
+        # the function delivering the refs of a URI (e.g. 'browse' of the
+        # library provider)
+        self._browse = browse
+        self._max_workers = max_workers
+        self._tasks = queue.PriorityQueue()
+        # unique and increasing numbers keep tasks with equal priorities in order
+        self._sequence = itertools.count()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # the predicted URIs and their state (the oldest first)
+        self._predictions = collections.OrderedDict()
+        self._statistics = dict.fromkeys(
+            ("scheduled", "hits", "late", "misses", "unused"), 0
+        )
+        self._statistics_lock = threading.Lock()
+        # remaining number of URIs browsed by the warm-up (None: unlimited)
+        self._warm_up_budget = None
+
+    def warm_up(self, root_uri, max_uris=None):
+        """browse the hierarchy below the given URI
+
+        The hierarchy is browsed level by level.  'max_uris' limits the number
+        of browsed URIs: the warm-up should not evict its own results (e.g.
+        the top levels) from the caches.
+        """
+        logger.info("Beets - warming up the caches for browsing")
+        with self._lock:
+            self._warm_up_budget = max_uris
+        self._schedule(root_uri, WARM_UP_PRIORITY, recursive=True)
+
+    def prefetch(self, uris):
+        """browse the URIs in the background, since the user may browse one of
+        them soon
+        """
+        scheduled = []
+        with self._statistics_lock:
+            for uri in uris:
+                if uri in self._predictions:
+                    continue
+                self._predictions[uri] = PENDING
+                self._statistics["scheduled"] += 1
+                scheduled.append(uri)
+            while len(self._predictions) > MAX_TRACKED_PREDICTIONS:
+                _, state = self._predictions.popitem(last=False)
+                if state != USED:
+                    self._statistics["unused"] += 1
+        for uri in scheduled:
+            self._schedule(uri, PREDICTION_PRIORITY)
+
+    def register_browse(self, uri):
+        """count whether a URI browsed by the user was predicted before"""
+        with self._statistics_lock:
+            state = self._predictions.get(uri)
+            if state is None:
+                self._statistics["misses"] += 1
+            elif state == PENDING:
+                # the prediction was right, but too late
+                self._statistics["late"] += 1
+            else:
+                self._statistics["hits"] += 1
+                self._predictions[uri] = USED
+
+    def get_statistics(self):
+        """returns the counters of predictions and their usage
+
+        'hits' and 'late' are predicted URIs browsed by the user after or
+        before their prefetching was finished.  'misses' are URIs browsed by
+        the user without being predicted.  'unused' predictions were never
+        browsed by the user.
+        """
+        with self._statistics_lock:
+            return dict(self._statistics)
+
+    def join(self):
+        """wait until all scheduled tasks are processed"""
+        self._tasks.join()
+
+    def stop(self):
+        statistics = self.get_statistics()
+        if statistics["scheduled"]:
+            logger.info(f"Beets - browse prefetch statistics: {statistics}")
+        with self._lock:
+            self._stop_event.set()
+            for _ in self._workers:
+                self._tasks.put((STOP_PRIORITY, next(self._sequence), None, False))
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.join()
+
+    def _schedule(self, uri, priority, *, recursive=False):
+        with self._lock:
+            if self._stop_event.is_set():
+                return
+            if recursive and self._warm_up_budget is not None:
+                if self._warm_up_budget <= 0:
+                    return
+                self._warm_up_budget -= 1
+            self._tasks.put((priority, next(self._sequence), uri, recursive))
+            while len(self._workers) < self._max_workers:
+                worker = threading.Thread(
+                    target=self._process_tasks,
+                    name=f"BeetsPrefetch-{len(self._workers)}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _process_tasks(self):
+        while True:
+            priority, _, uri, recursive = self._tasks.get()
+            try:
+                if uri is None or self._stop_event.is_set():
+                    break
+                self._process(uri, priority, recursive=recursive)
+            finally:
+                self._tasks.task_done()
+
+    def _process(self, uri, priority, *, recursive):
+        try:
+            refs = self._browse(uri)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Beets - Failed to prefetch {uri}: {exc}")
+            return
+        with self._statistics_lock:
+            if self._predictions.get(uri) == PENDING:
+                self._predictions[uri] = DONE
+        if recursive:
+            # the sub-directories are scheduled before this task is done
+            for ref in refs:
+                if ref.type in BROWSABLE_REF_TYPES:
+                    self._schedule(ref.uri, priority, recursive=True)
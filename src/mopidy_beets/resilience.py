@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BeetsRequestError(Exception):
+    """The beets web API failed to deliver a response"""
+
+
+class CircuitBreaker:
+    """Stop sending requests to a failing server for a while
+
+    After 'threshold' consecutive failures the circuit is "open": requests are
+    rejected immediately for 'reset_timeout' seconds.  Afterwards a single
+    trial request is allowed.  Its success closes the circuit again, while its
+    failure keeps the circuit open for another period.
+    A threshold of zero disables the circuit breaker.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        with self._lock:
+            return self._opened is not None
+
+    def allow_request(self):
+        """returns whether a request should be sent"""
+        with self._lock:
+            if self._opened is None:
+                return True
+            if self._trial_running or (
+                time.monotonic() - self._opened < self.reset_timeout
+            ):
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened is not None:
+                logger.info("Beets - the server responds again")
+            self._failures = 0
+            self._opened = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.threshold and (self._failures >= self.threshold):
+                if self._opened is None:
+                    logger.warning(
+                        "Beets - the server failed %d times: pausing requests "
+                        "for %d seconds",
+                        self._failures,
+                        self.reset_timeout,
+                    )
+                self._opened = time.monotonic()
@@ -0,0 +1,167 @@
+import json
+import logging
+import re
+import threading
+
+from mopidy_beets.matching import filter_exact_matches
+
+logger = logging.getLogger(__name__)
+
+# the tables corresponding to the endpoints of the beets web API
+TABLES = {"/item": "items", "/album": "albums"}
+
+# the fields used by beets for queries without a field name
+SEARCH_FIELDS = {
+    "items": ("artist", "title", "comments", "album", "albumartist", "genre"),
+    "albums": ("album", "albumartist", "genre"),
+}
+
+FIELD_NAME_REGEX = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+INTEGER_REGEX = re.compile(r"^-?[0-9]+$")
+
+
+def validate_field_name(field):
+    """field names are part of SQL statements: accept only simple names"""
+    if not FIELD_NAME_REGEX.match(field):
+        msg = f"Invalid field name: {field}"
+        raise ValueError(msg)
+    return field
+
+
+def _get_comparable_values(value):
+    """return the values equal to the given value in beets' query semantics
+
+    Query values are often strings (e.g. the year within a browse URI),
+    while numeric fields are stored as numbers.  SQLite does not consider
+    2012 and '2012' to be equal.
+    """
+    if isinstance(value, str) and INTEGER_REGEX.match(value):
+        return [value, int(value)]
+    return [value]
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SQLiteLibrary:
+    """Queries for the items and albums of a library stored in SQLite
+
+    The datasets are dicts resembling the datasets delivered by the beets web
+    API.  Subclasses define how the fields of a dataset are accessed within
+    SQL statements ('_field_expression') and how datasets are loaded
+    ('_select_datasets').
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _field_expression(self, table, field):
+        """return the SQL expression for accessing a field of a dataset"""
+        raise NotImplementedError
+
+    def _select_datasets(self, table, condition, parameters, order):
+        """return the datasets of the table matching the SQL condition"""
+        raise NotImplementedError
+
+    def get_ids(self, table):
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT id FROM {table}"  # noqa: S608
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def get_by_ids(self, table, ids):
+        ids = list(ids)
+        datasets = {
+            dataset["id"]: dataset
+            for dataset in self._select_datasets(
+                table, "id IN (SELECT value FROM json_each(?))", [json.dumps(ids)], "id"
+            )
+        }
+        return [datasets[item_id] for item_id in ids if item_id in datasets]
+
+    def get_modified_since(self, table, field, timestamp):
+        """return the datasets with a date field (e.g. 'mtime') not before the
+        given timestamp
+        """
+        return self._select_datasets(
+            table, f"{self._field_expression(table, field)} >= ?", [timestamp], "id"
+        )
+
+    def query(self, table, attributes, exact_text, sort_fields):
+        """return the datasets matching the attributes
+
+        The semantics of the arguments are the same as for
+        BeetsRemoteClient._get_objects_by_attribute.
+        """
+        conditions = []
+        parameters = []
+        exact_query_list = []
+        for attribute in attributes:
+            if isinstance(attribute, str):
+                expressions = [
+                    self._field_expression(table, field)
+                    for field in SEARCH_FIELDS[table]
+                ]
+                conditions.append(
+                    "({})".format(
+                        " OR ".join(f"{e} LIKE ? ESCAPE '\\'" for e in expressions)
+                    )
+                )
+                parameters.extend([f"%{_escape_like(attribute)}%"] * len(expressions))
+                exact_query_list.append((None, attribute))
+                continue
+            key = attribute[0].lower()
+            value = attribute[1]
+            expression = self._field_expression(table, key)
+            if isinstance(value, str) and not exact_text:
+                conditions.append(f"{expression} LIKE ? ESCAPE '\\'")
+                parameters.append(f"%{_escape_like(value)}%")
+                continue
+            # match any of the given values
+            values = [
+                comparable
+                for single_value in (
+                    value if isinstance(value, (tuple, list)) else [value]
+                )
+                for comparable in _get_comparable_values(single_value)
+            ]
+            if len(values) == 1:
+                conditions.append(f"{expression} = ?")
+                parameters.append(values[0])
+            else:
+                conditions.append(
+                    f"{expression} IN (SELECT value FROM json_each(?))"  # noqa: S608
+                )
+                parameters.append(json.dumps(values))
+        order = []
+        for sort_field in sort_fields or []:
+            if (len(sort_field) > 1) and (sort_field[-1] in ("-", "+")):
+                direction = "ASC" if sort_field[-1] == "+" else "DESC"
+                expression = self._field_expression(table, sort_field[:-1])
+                order.append(f"{expression} COLLATE NOCASE {direction}")
+            else:
+                logger.info("Beets - invalid sorting field ignore: %s", sort_field)
+        order.append("id")
+        items = self._select_datasets(
+            table, " AND ".join(conditions) or "1", parameters, ", ".join(order)
+        )
+        if exact_text:
+            items = list(filter_exact_matches(items, exact_query_list))
+        return items
+
+    def get_unique_values(self, table, field, sort_field):
+        expression = self._field_expression(table, field)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT DISTINCT {expression} FROM {table} "  # noqa: S608
+                f"ORDER BY {self._field_expression(table, sort_field)}"
+            ).fetchall()
+        return [row[0] for row in rows if row[0] is not None]
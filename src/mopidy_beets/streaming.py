@@ -0,0 +1,71 @@
+import codecs
+import json
+import re
+
+_WHITESPACE_REGEX = re.compile(r"[ \t\n\r]*")
+
+# Incomplete data is buffered until it can be parsed.  Beyond this number of
+# characters the data is considered to be invalid (instead of incomplete).
+MAX_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def _skip_whitespace(text, position):
+    match = _WHITESPACE_REGEX.match(text, position)
+    return position if match is None else match.end()
+
+
+def _find_array_start(chunks, text_decoder, key, max_buffer_size):
+    """return the received text and the position following the opening
+    bracket of the array
+    """
+    start_regex = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+    buffer = ""
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        match = start_regex.search(buffer)
+        if match:
+            return buffer, match.end()
+        if len(buffer) > max_buffer_size:
+            break
+    msg = f"Missing JSON array: {key}"
+    raise ValueError(msg)
+
+
+def iterate_json_array(chunks, key, max_buffer_size=MAX_BUFFER_SIZE):
+    """generate the elements of an array within a JSON object
+
+    The JSON object is received as a sequence of chunks (bytes), e.g. via
+    'requests.Response.iter_content'.  The array is expected to be the value
+    of the given key of the top level object (e.g. '{"results": [...]}').
+    Every element is parsed and delivered as soon as it is complete.  Thus
+    the memory consumption is bounded by the size of a single element
+    instead of the size of the whole response.
+    A ValueError is raised for incomplete or invalid data.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer, position = _find_array_start(chunks, text_decoder, key, max_buffer_size)
+    while True:
+        position = _skip_whitespace(buffer, position)
+        if buffer.startswith(",", position):
+            position = _skip_whitespace(buffer, position + 1)
+        if buffer.startswith("]", position):
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as exc:
+            if len(buffer) - position > max_buffer_size:
+                msg = f"Invalid JSON array: {key}"
+                raise ValueError(msg) from exc
+            # the element is probably incomplete: wait for more data
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                msg = f"Incomplete JSON array: {key}"
+                raise ValueError(msg) from None
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+            position = 0
+        else:
+            yield element
+            position = end
@@ -0,0 +1,63 @@
+# the date fields of items, which reveal additions and modifications
+MODIFICATION_FIELDS = ("mtime", "added")
+
+
+class ItemSynchronizer:
+    """Determine the changes of the items of a beets library
+
+    The highest values of the 'mtime' and 'added' fields of all items seen so
+    far are remembered.  Subsequent runs request only the items added or
+    modified since then.  Removed items are detected by comparing the list
+    of known item IDs with the IDs currently stored in the beets library.
+    """
+
+    def __init__(self, client, chunk_size, known_ids=(), modification_times=None):
+        self._client = client
+        self._chunk_size = chunk_size
+        self.known_ids = set(known_ids)
+        # the highest known value of each of the MODIFICATION_FIELDS
+        self.modification_times = dict(modification_times or {})
+
+    def synchronize(self):
+        """retrieve the changes since the previous run
+
+        The result is a tuple of the removed item IDs and an iterator of lists
+        of added or modified item datasets.
+        Items are retrieved and registered as known only while the iterator is
+        consumed.  Thus an interrupted run is continued with the next run.
+        """
+        remote_ids = set(self._client.get_ids("/item"))
+        removed_ids = self.known_ids - remote_ids
+        self.known_ids -= removed_ids
+        return removed_ids, self._iterate_changed_items(remote_ids)
+
+    def _iterate_changed_items(self, remote_ids):
+        modified_items = {}
+        for field, timestamp in self.modification_times.items():
+            for dataset in self._client.get_datasets_modified_since(
+                "/item", field, timestamp
+            ):
+                # The query delivers also the most recent items of the previous
+                # run (due to its limited precision of seconds).
+                if (dataset["id"] not in self.known_ids) or (
+                    dataset.get(field, 0) > timestamp
+                ):
+                    modified_items[dataset["id"]] = dataset
+        if modified_items:
+            datasets = list(modified_items.values())
+            self._register(datasets)
+            yield datasets
+        missing_ids = sorted(remote_ids - self.known_ids)
+        for index in range(0, len(missing_ids), self._chunk_size):
+            chunk = missing_ids[index : index + self._chunk_size]
+            datasets = self._client.get_remote_datasets_by_ids("/item", "items", chunk)
+            self._register(datasets)
+            yield datasets
+
+    def _register(self, datasets):
+        for dataset in datasets:
+            self.known_ids.add(dataset["id"])
+            for field in MODIFICATION_FIELDS:
+                value = dataset.get(field)
+                if value and value > self.modification_times.get(field, 0):
+                    self.modification_times[field] = value
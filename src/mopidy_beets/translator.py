@@ -2,8 +2,10 @@ import logging
 import urllib.error
 import urllib.parse
 import urllib.request
+from typing import NamedTuple
 
-from mopidy.models import Album, Artist, Track
+from mopidy.models import Album, Artist, Ref, Track
+from mopidy.types import Uri
 
 logger = logging.getLogger(__name__)
 
@@ -26,26 +28,41 @@ def parse_date(data):
     return f"{year:04d}"
 
 
-def _apply_beets_mapping(target_class, mapping, data):
-    """evaluate a mapping of target keys and their source keys or callables
+def _compile_mapping(mapping):
+    """prepare a mapping of target keys and their source keys or callables
 
-    'target_class' is the Mopidy model to be used for creating the item.
     'mapping' is a dict of {'target': source}.
     Here 'source' could be one of the following types:
-        * string: the key for the corresponding value in 'data'
-        * callable: a function with a dict ('data') as its only parameter
+        * string: the key for the corresponding value in the data
+        * callable: a function with a dict (the data) as its only parameter
+    The mapping is split into both kinds of sources once (instead of checking
+    the type of every source for every item).
     """
-    kwargs = {}
-    for key, map_value in mapping.items():
-        if map_value is None:
-            value = None
-        elif callable(map_value):
-            value = map_value(data)
-        else:
-            value = data.get(map_value, None)
-        # ignore None, empty strings or zeros (e.g. for length)
-        if value:
+    keys = tuple(
+        (target, source)
+        for target, source in mapping.items()
+        if isinstance(source, str)
+    )
+    functions = tuple(
+        (target, source) for target, source in mapping.items() if callable(source)
+    )
+    return keys, functions
+
+
+def _apply_beets_mapping(target_class, mapping, data, **values):
+    """evaluate a compiled mapping (see '_compile_mapping')
+
+    'target_class' is the Mopidy model to be used for creating the item.
+    'values' are additional attributes of the item, which were determined
+    separately.
+    """
+    keys, functions = mapping
+    # ignore None, empty strings or zeros (e.g. for length)
+    kwargs = {key: value for key, source in keys if (value := data.get(source))}
+    for key, func in functions:
+        if value := func(data):
             kwargs[key] = value
+    kwargs.update({key: value for key, value in values.items() if value})
     return target_class(**kwargs) if kwargs else None
 
 
@@ -53,53 +70,99 @@ def _filter_none(values):
     return [value for value in values if value is not None]
 
 
-def parse_artist(data, name_keyword):
+# the keys of the sortname and the musicbrainz ID for each kind of artist
+ARTIST_KEYWORDS = {
+    "artist": ("artist_sort", "mb_artistid"),
+    "albumartist": ("albumartist_sort", "mb_albumartistid"),
+}
+
+
+def parse_artist(data, name_keyword, known_artists=None):
     # see https://docs.mopidy.com/en/latest/api/models/#mopidy.models.Artist
-    mapping = {
-        "uri": lambda d: assemble_uri("beets:library:artist", id_value=d[name_keyword]),
-        "name": name_keyword,
+    # 'known_artists' (optional) is a dict (e.g. a WeakValueDictionary) for
+    # sharing the artists parsed before (indexed by their name, sortname and
+    # musicbrainz ID).
+    # Other artists (e.g. composers) have neither sortname nor musicbrainz ID.
+    sort_keyword, mbid_keyword = ARTIST_KEYWORDS.get(name_keyword, (None, None))
+    name = data[name_keyword]
+    key = (name, data.get(sort_keyword), data.get(mbid_keyword))
+    if known_artists is not None:
+        try:
+            return known_artists[key]
+        except KeyError:
+            pass
+    kwargs = {
+        "uri": assemble_uri("beets:library:artist", id_value=name),
+        "name": key[0],
+        "sortname": key[1],
+        "musicbrainz_id": key[2],
     }
-    if name_keyword == "artist":
-        mapping["sortname"] = "artist_sort"
-        mapping["musicbrainz_id"] = "mb_artistid"
-    elif name_keyword == "albumartist":
-        mapping["sortname"] = "albumartist_sort"
-        mapping["musicbrainz_id"] = "mb_albumartistid"
-    else:
-        # others - e.g. composers
-        pass
-    return _apply_beets_mapping(Artist, mapping, data)
+    artist = Artist(**{key: value for key, value in kwargs.items() if value})
+    if known_artists is not None:
+        known_artists[key] = artist
+    return artist
 
 
-def parse_album(data, _api):
-    # see https://docs.mopidy.com/en/latest/api/models/#mopidy.models.Album
-    # The order of items is based on the above documentation.
-    # Attributes without corresponding Beets data are mapped to 'None'.
-    mapping = {
+# see https://docs.mopidy.com/en/latest/api/models/#mopidy.models.Album
+# The order of items is based on the above documentation.
+# Artists are parsed separately.
+ALBUM_MAPPING = _compile_mapping(
+    {
         "uri": lambda d: assemble_uri("beets:library:album", id_value=d["id"]),
         "name": "album",
-        "artists": lambda d: _filter_none([parse_artist(d, "albumartist")]),
         "num_tracks": "tracktotal",
         "num_discs": "disctotal",
         "date": parse_date,
         "musicbrainz_id": "mb_albumid",
     }
-    return _apply_beets_mapping(Album, mapping, data)
+)
+
+
+def parse_album(data, _api, known_artists=None):
+    # 'known_artists' (optional): see 'parse_artist'
+    return _apply_beets_mapping(
+        Album,
+        ALBUM_MAPPING,
+        data,
+        artists=_filter_none([parse_artist(data, "albumartist", known_artists)]),
+    )
+
+
+class AlbumSummary(NamedTuple):
+    """the attributes of an album needed for browsing (see 'parse_album')"""
+
+    uri: str
+    name: str | None
+    artist: str | None
+    date: str | None
+
+
+def parse_album_summary(data):
+    return AlbumSummary(
+        uri=assemble_uri("beets:library:album", id_value=data["id"]),
+        name=data.get("album") or None,
+        artist=data.get("albumartist") or None,
+        date=parse_date(data),
+    )
+
+
+def _get_track_album(data, api, albums):
+    album_id = data.get("album_id")
+    if not album_id:
+        return None
+    if albums is not None:
+        return albums.get(album_id)
+    return api.get_album(album_id)
 
 
-def parse_track(data, api):
-    # see https://docs.mopidy.com/en/latest/api/models/#mopidy.models.Track
-    # The order of items is based on the above documentation.
-    # Attributes without corresponding Beets data are mapped to 'None'.
-    mapping = {
+# see https://docs.mopidy.com/en/latest/api/models/#mopidy.models.Track
+# The order of items is based on the above documentation.
+# Artists and the album are parsed separately.  Attributes without
+# corresponding Beets data (e.g. 'performers') are omitted.
+TRACK_MAPPING = _compile_mapping(
+    {
         "uri": lambda d: f"beets:library:track;{d['id']}",
         "name": "title",
-        "artists": lambda d: _filter_none([parse_artist(d, "artist")]),
-        "album": lambda d, api=api: (
-            api.get_album(d["album_id"]) if d.get("album_id") else None
-        ),
-        "composers": lambda d: _filter_none([parse_artist(d, "composer")]),
-        "performers": None,
         "genre": "genre",
         "track_no": "track",
         "disc_no": "disc",
@@ -110,7 +173,28 @@ def parse_track(data, api):
         "musicbrainz_id": "mb_trackid",
         "last_modified": lambda d: int(d.get("mtime", 0)),
     }
-    return _apply_beets_mapping(Track, mapping, data)
+)
+
+
+def parse_track(data, api, albums=None, known_artists=None):
+    # 'albums' (optional) is a dict of prefetched albums indexed by their ID.
+    # Without this dict, the album is retrieved via the API.
+    # 'known_artists' (optional): see 'parse_artist'
+    return _apply_beets_mapping(
+        Track,
+        TRACK_MAPPING,
+        data,
+        artists=_filter_none([parse_artist(data, "artist", known_artists)]),
+        album=_get_track_album(data, api, albums),
+        composers=_filter_none([parse_artist(data, "composer", known_artists)]),
+    )
+
+
+def parse_track_ref(data):
+    # a lightweight alternative to 'parse_track' for browsing
+    return Ref.track(
+        uri=Uri(f"beets:library:track;{data['id']}"), name=data.get("title") or None
+    )
 
 
 def parse_uri(uri, uri_prefix=None):
@@ -14,6 +14,35 @@ class MopidyBeetsTest(unittest.TestCase):
         config["enabled"] = True
         config["hostname"] = "example.org"
         config["port"] = 8337
+        config["connect_timeout"] = 4
+        config["read_timeout"] = 4
+        config["connection_pool_size"] = 10
+        config["request_retries"] = 2
+        config["retry_backoff"] = 0
+        config["compression"] = True
+        config["cache_size"] = 4096
+        config["cache_ttl"] = 3600
+        config["stale_while_revalidate"] = False
+        config["circuit_breaker_threshold"] = 5
+        config["circuit_breaker_timeout"] = 30
+        config["lookup_chunk_size"] = 100
+        config["max_concurrent_requests"] = 1
+        config["stream_responses"] = False
+        config["metrics_interval"] = 0
+        config["metrics_file"] = None
+        config["search_limit"] = 0
+        config["warmup"] = False
+        config["browse_prefetch"] = 0
+        config["prefetch_workers"] = 1
+        config["library_db"] = None
+        config["local_playback"] = False
+        config["beets_music_directory"] = None
+        config["local_music_directory"] = None
+        config["audio_cache_size"] = 0
+        config["audio_cache_read_ahead"] = 2
+        config["audio_cache_eviction"] = "lru"
+        config["mirror"] = False
+        config["mirror_refresh_interval"] = 600
         return {"beets": config, "proxy": {}}
 
     def setUp(self):
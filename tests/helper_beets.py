@@ -130,4 +130,5 @@ class BeetsAPILibraryTest(MopidyBeetsTest):
             self.beets.lib.add_album(album_items)
 
     def tearDown(self):
+        self.backend.on_stop()
         self.beets.stop()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import ClassVar
+
+from mopidy_beets.audio_cache import AudioCache
+from mopidy_beets.resilience import BeetsRequestError
+
+from .helper_beets import BeetsAlbum, BeetsAPILibraryTest, BeetsTrack
+
+
+class AudioCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.directory = Path(self._directory.name)
+        self.downloads = []
+
+    def download(self, track_id, output):
+        if track_id == "broken":
+            output.write(b"x")
+            msg = "connection lost"
+            raise BeetsRequestError(msg)
+        self.downloads.append(track_id)
+        output.write(b"x" * 10)
+
+    def get_cache(self, max_bytes=30, **kwargs):
+        return AudioCache(
+            self.directory, max_bytes, self.download, lambda _: [], **kwargs
+        )
+
+    def test_store(self):
+        cache = self.get_cache()
+        assert cache.get_file_uri(1) is None
+        cache.store(1)
+        assert cache.get_file_uri(1) == (self.directory / "1").as_uri()
+        cache.store("broken")
+        assert cache.get_file_uri("broken") is None
+        assert sorted(path.name for path in self.directory.iterdir()) == ["1"]
+
+    def test_least_recently_used(self):
+        cache = self.get_cache()
+        for track_id in (1, 2, 3):
+            cache.store(track_id)
+        cache.get_file_uri(1)
+        cache.store(4)
+        assert cache.get_file_uri(2) is None
+        assert all(cache.get_file_uri(track_id) for track_id in (1, 3, 4))
+
+    def test_first_in_first_out(self):
+        cache = self.get_cache(eviction_policy="fifo")
+        for track_id in (1, 2, 3):
+            cache.store(track_id)
+        cache.get_file_uri(1)
+        cache.store(4)
+        assert cache.get_file_uri(1) is None
+        assert all(cache.get_file_uri(track_id) for track_id in (2, 3, 4))
+
+    def test_files_are_kept_across_restarts(self):
+        for index, name in enumerate(("1", "2", "3", "4")):
+            path = self.directory / name
+            path.write_bytes(b"x" * 10)
+            os.utime(path, (index, index))
+        (self.directory / "5.part").write_bytes(b"x")
+        cache = self.get_cache()
+        assert cache.get_file_uri(1) is None
+        assert all(cache.get_file_uri(track_id) for track_id in (2, 3, 4))
+        assert not (self.directory / "5.part").exists()
+
+    def test_read_ahead(self):
+        cache = AudioCache(
+            self.directory, 100, self.download, lambda _: [2, 3, 4], read_ahead=2
+        )
+        cache.read_ahead(1)
+        cache.join()
+        cache.stop()
+        assert self.downloads == [2, 3]
+
+
+class AudioCachePlaybackTest(BeetsAPILibraryTest):
+    BEETS_ALBUMS: ClassVar[list[BeetsAlbum]] = [
+        BeetsAlbum(
+            "Album-Title-1",
+            "Album-Artist-1",
+            [BeetsTrack("Title-1"), BeetsTrack("Title-2"), BeetsTrack("Title-3")],
+        ),
+    ]
+
+    def setUp(self):
+        self._cache_directory = tempfile.TemporaryDirectory()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self._cache_directory.cleanup()
+
+    def get_config(self):
+        config = super().get_config()
+        config["beets"]["audio_cache_size"] = 100
+        config["beets"]["audio_cache_read_ahead"] = 1
+        config["core"] = {"cache_dir": self._cache_directory.name}
+        return config
+
+    def test_following_track_is_cached(self):
+        playback = self.backend.playback
+        items = {item.title: item for item in self.beets.lib.items()}
+        first_uri = f"beets:library:track;{items['Title-1'].id}"
+        second_id = items["Title-2"].id
+        second_uri = f"beets:library:track;{second_id}"
+        stream_url = self.backend.beets_api.get_track_stream_url(items["Title-1"].id)
+        assert playback.translate_uri(first_uri) == stream_url
+        playback.audio_cache.join()
+        uri = playback.translate_uri(second_uri)
+        path = Path(self._cache_directory.name) / "beets" / "audio" / str(second_id)
+        assert uri == path.as_uri()
+        assert path.read_bytes() == Path(items["Title-2"].path.decode()).read_bytes()
+        # only the following track was downloaded (not the last one)
+        assert not path.with_name(str(items["Title-3"].id)).exists()
@@ -1,5 +1,14 @@
+import threading
+import time
 from typing import ClassVar
+from unittest import mock
 
+import pytest
+
+from mopidy_beets.prefetch import BrowsePrefetcher
+from mopidy_beets.resilience import BeetsRequestError
+
+from . import TEST_DATA_DIRECTORY
 from .helper_beets import BeetsAlbum, BeetsAPILibraryTest, BeetsTrack
 
 
@@ -57,3 +66,278 @@ class LookupTest(BeetsAPILibraryTest):
         expected_album_genres = sorted(str(album.year) for album in self.BEETS_ALBUMS)
         received_album_genres = [item.name for item in response]
         assert received_album_genres == expected_album_genres
+
+    def test_browse_album(self):
+        (album_ref,) = self.backend.library.browse(
+            "beets:library:albums-by-artist;Album-Artist-1"
+        )
+        track_refs = self.backend.library.browse(album_ref.uri)
+        assert [ref.name for ref in track_refs] == ["Title-1", "Title-2", "Title-3"]
+        # neither tracks nor albums were parsed
+        assert "/album/{id}" not in self.backend.beets_api.get_request_statistics()
+
+    def test_warm_up(self):
+        library = self.backend.library
+        library.prefetcher.warm_up(library.root_directory.uri)
+        library.prefetcher.join()
+        api = self.backend.beets_api
+        misses = {
+            name: statistics["misses"]
+            for name, statistics in api.get_cache_statistics().items()
+        }
+        # browse everything: all results are cached
+        for category in self.BROWSE_CATEGORIES:
+            for directory in library.browse(self.get_uri(category)):
+                for album in library.browse(directory.uri):
+                    assert library.browse(album.uri)
+        assert {
+            name: statistics["misses"]
+            for name, statistics in api.get_cache_statistics().items()
+        } == misses
+
+    def test_warm_up_limit(self):
+        library = self.backend.library
+        root_uri = library.root_directory.uri
+        categories = [ref.uri for ref in library.browse(root_uri)]
+        browsed = []
+
+        def browse(uri):
+            browsed.append(uri)
+            return library.browse(uri)
+
+        prefetcher = BrowsePrefetcher(browse)
+        prefetcher.warm_up(root_uri, max_uris=1 + len(categories))
+        prefetcher.join()
+        prefetcher.stop()
+        # the top levels are browsed first
+        assert browsed == [root_uri, *categories]
+
+    def test_browse_prefetch(self):
+        library = self.backend.library
+        library.browse_prefetch = 10
+        artist_ref = library.browse(self.get_uri("albums-by-artist"))[0]
+        (album_ref,) = library.browse(artist_ref.uri)
+        library.prefetcher.join()
+        api = self.backend.beets_api
+        misses = api.get_cache_statistics()["get_track_refs_by"]["misses"]
+        assert library.browse(album_ref.uri)
+        # the tracks of the album were retrieved in the background
+        assert api.get_cache_statistics()["get_track_refs_by"]["misses"] == misses
+        statistics = library.prefetcher.get_statistics()
+        assert statistics["scheduled"] == 1
+        assert statistics["hits"] == 1
+        assert statistics["misses"] == 0
+
+    def test_get_distinct(self):
+        library = self.backend.library
+        assert library.get_distinct("album") == {"Album-Title-1", "Album-Title-2"}
+        assert library.get_distinct("date") == {"2012"}
+        assert library.get_distinct("performer") == set()
+
+    def test_get_distinct_with_query(self):
+        library = self.backend.library
+        assert library.get_distinct(
+            "track", {"artist": ["Album-Artist-1"], "any": ["Genre-1"]}
+        ) == {"Title-1", "Title-2", "Title-3"}
+        assert library.get_distinct("date", {"genre": ["Genre-1"]}) == {"2012"}
+        # queries are exact
+        assert library.get_distinct("album", {"artist": ["Album-Artist"]}) == set()
+        # album attributes are determined via albums
+        assert library.get_distinct("album", {"albumartist": ["Album-Artist-2"]}) == {
+            "Album-Title-2"
+        }
+        statistics = self.backend.beets_api.get_request_statistics()
+        assert statistics["/album/query"]["requests"] == 1
+
+    def test_unique_values_without_values_endpoint(self):
+        api = self.backend.beets_api
+        original_get = api._get  # noqa: SLF001
+
+        def get_without_values_endpoint(url, **kwargs):
+            if "/values/" in url:
+                raise KeyError(url)
+            return original_get(url, **kwargs)
+
+        with mock.patch.object(
+            api, "_get", side_effect=get_without_values_endpoint
+        ) as get:
+            assert api.get_sorted_unique_track_attributes("album") == [
+                "Album-Title-1",
+                "Album-Title-2",
+            ]
+            assert api.get_sorted_unique_album_attributes("genre") == ["", "Genre-1"]
+            # the server is probed only once
+            values_requests = [
+                call.args[0]
+                for call in get.call_args_list
+                if "/values/" in call.args[0]
+            ]
+            assert values_requests == ["/item/values/format?sort_key=format"]
+
+    def test_get_ids(self):
+        api = self.backend.beets_api
+        item_ids = sorted(item.id for item in self.beets.lib.items())
+        assert api.get_ids("/item") == item_ids
+        api._values_endpoint_supported = False  # noqa: SLF001
+        assert api.get_ids("/item") == item_ids
+        with (
+            mock.patch.object(api, "_get", return_value=None),
+            pytest.raises(BeetsRequestError),
+        ):
+            api.get_ids("/album")
+
+    def test_search_resolves_albums(self):
+        response = self.backend.library.search({"track_name": ["Title-1"]})
+        received_albums = sorted(track.album.name for track in response.tracks)
+        assert received_albums == ["Album-Title-1", "Album-Title-2"]
+
+    def test_get_tracks_page(self):
+        api = self.backend.beets_api
+        pages = []
+        offset = 0
+        while offset is not None:
+            tracks, offset = api.get_tracks_page(
+                ["Title"],
+                False,  # noqa: FBT003
+                ["title+"],
+                3,
+                offset=offset,
+            )
+            pages.append([track.name for track in tracks])
+        assert pages == [["Title-1", "Title-1", "Title-2"], ["Title-3"]]
+
+    def test_search_limit(self):
+        limit = 2
+        self.backend.library.search_limit = limit
+        response = self.backend.library.search({"any": ["Title"]})
+        assert len(response.tracks) == limit
+
+    def test_artists_and_albums_are_shared(self):
+        api = self.backend.beets_api
+        (first,) = api.get_tracks_by([("title", "Title-2")], True, [])  # noqa: FBT003
+        # the shared objects outlive the caches
+        api.caches.clear()
+        (second,) = api.get_tracks_by([("title", "Title-3")], True, [])  # noqa: FBT003
+        assert first.album is second.album
+        assert next(iter(first.artists)) is next(iter(second.artists))
+
+    def test_get_tracks_synchronization(self):
+        api = self.backend.beets_api
+        # synchronize on every call
+        api.caches.ttl = 0
+        received_titles = sorted(track.name for track in api.get_tracks())
+        assert received_titles == ["Title-1", "Title-1", "Title-2", "Title-3"]
+        item = self.beets.lib.items("title:Title-3").get()
+        item.title = "Title-4"
+        item.mtime = time.time()
+        item.store()
+        self.beets.lib.items("title:Title-2").get().remove()
+        received_titles = sorted(track.name for track in api.get_tracks())
+        assert received_titles == ["Title-1", "Title-1", "Title-4"]
+
+    def test_request_statistics(self):
+        self.backend.library.browse("beets:library:albums-by-artist;Album-Artist-1")
+        statistics = self.backend.beets_api.get_request_statistics()
+        assert statistics["/album/query"]["requests"] == 1
+        assert statistics["/album/query"]["failures"] == 0
+        assert statistics["/album/query"]["bytes"] > 0
+
+    def test_server_unavailable(self):
+        uri = "beets:library:albums-by-artist;Album-Artist-1"
+        album_refs = self.backend.library.browse(uri)
+        self.beets.stop()
+        # expired entries are delivered, if the server does not respond
+        later = time.monotonic() + 2 * self.backend.beets_api.caches.ttl
+        with mock.patch("mopidy_beets.cache.time.monotonic", return_value=later):
+            assert self.backend.library.browse(uri) == album_refs
+            assert self.backend.library.search({"any": ["Title-1"]}).tracks == ()
+
+    def test_lookup_many(self):
+        album_uri = self.backend.library.browse(
+            "beets:library:albums-by-artist;Album-Artist-1"
+        )[0].uri
+        track_uris = [track.uri for track in self.backend.library.browse(album_uri)]
+        uris = [
+            track_uris[2],
+            "beets:library:artist;Album-Artist-2",
+            album_uri,
+            track_uris[0],
+            "beets:library:track;9999",
+        ]
+        response = self.backend.library.lookup(uris=uris)
+        assert list(response) == uris
+        received_titles = [
+            [track.name for track in tracks] for tracks in response.values()
+        ]
+        assert received_titles == [
+            ["Title-3"],
+            ["Title-1"],
+            ["Title-1", "Title-2", "Title-3"],
+            ["Title-1"],
+            [],
+        ]
+
+
+class ConcurrentLookupTest(LookupTest):
+    @staticmethod
+    def get_config():
+        config = LookupTest.get_config()
+        config["beets"]["lookup_chunk_size"] = 1
+        config["beets"]["max_concurrent_requests"] = 4
+        return config
+
+    def test_get_images(self):
+        album = self.beets.lib.albums("album:Album-Title-1").get()
+        album.artpath = bytes(TEST_DATA_DIRECTORY / "beets-rsrc" / "min.mp3")
+        album.store()
+        album_refs = self.backend.library.browse("beets:library:albums-by-year")
+        album_uris = [self.backend.library.browse(ref.uri)[0].uri for ref in album_refs]
+        track_uri = self.backend.library.browse(album_uris[1])[0].uri
+        response = self.backend.library.get_images([*album_uris, track_uri])
+        assert response[album_uris[0]] == []
+        assert len(response[album_uris[1]]) == 1
+        assert response[album_uris[1]][0].uri.endswith(f"/album/{album.id}/art")
+        assert response[track_uri] == response[album_uris[1]]
+
+    def test_lookup_many_sends_concurrent_requests(self):
+        track_uris = [
+            f"beets:library:track;{item.id}" for item in self.beets.lib.items()
+        ]
+        session = self.backend.beets_api.api
+        send_request = session.request
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current and maximum number of requests
+
+        def delayed_request(method, url, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            try:
+                time.sleep(0.05)
+                return send_request(method, url, **kwargs)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        with mock.patch.object(session, "request", delayed_request):
+            response = self.backend.library.lookup(uris=track_uris)
+        assert all(len(tracks) == 1 for tracks in response.values())
+        assert in_flight[1] > 1
+
+
+class StreamingLookupTest(LookupTest):
+    @staticmethod
+    def get_config():
+        config = LookupTest.get_config()
+        config["beets"]["stream_responses"] = True
+        return config
+
+    def test_invalid_response(self):
+        api = self.backend.beets_api
+        with mock.patch.object(
+            api, "_iterate_content", side_effect=lambda *_: iter([b"<html>"])
+        ):
+            with pytest.raises(BeetsRequestError):
+                list(api._get_results("/item/query/"))  # noqa: SLF001
+            # the failure is handled like an unavailable server
+            assert self.backend.library.search({"any": ["Title-1"]}).tracks == ()
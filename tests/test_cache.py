@@ -0,0 +1,164 @@
+import concurrent.futures
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pytest
+
+from mopidy_beets.cache import CacheRegistry, LRUCache, cache
+from mopidy_beets.resilience import BeetsRequestError
+
+
+class CachedApi:
+    def __init__(self, *, stale_while_revalidate=False):
+        self.caches = CacheRegistry(
+            max_size=2, ttl=60, stale_while_revalidate=stale_while_revalidate
+        )
+        self.calls = []
+        self.page_calls = []
+        self.failing = False
+        # blocks the requests until it is set
+        self.gate = threading.Event()
+        self.gate.set()
+
+    @cache()
+    def get_value(self, key):
+        self.calls.append(key)
+        self.gate.wait()
+        if self.failing:
+            msg = "server unavailable"
+            raise BeetsRequestError(msg)
+        return f"value-{key}-{len(self.calls)}"
+
+    @cache()
+    def get_page(self, key, offset=0):
+        self.page_calls.append((key, offset))
+        return key, offset
+
+    @cache(fallback=list)
+    def get_list(self):
+        raise BeetsRequestError
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_eviction_of_least_recently_used(self):
+        storage = LRUCache(max_size=2, ttl=60)
+        storage.put("a", 1)
+        storage.put("b", 2)
+        assert storage.get("a") == 1
+        storage.put("c", 3)
+        with pytest.raises(KeyError):
+            storage.get("b")
+        assert storage.get("a") == 1
+        statistics = storage.get_statistics()
+        assert statistics["evictions"] == 1
+        assert statistics["hits"] == statistics["size"]
+        assert statistics["misses"] == 1
+
+    def test_expiry(self):
+        storage = LRUCache(max_size=2, ttl=60)
+        with mock.patch("time.monotonic", return_value=100):
+            storage.put("a", 1)
+        with (
+            mock.patch("time.monotonic", return_value=161),
+            pytest.raises(KeyError),
+        ):
+            storage.get("a")
+        assert storage.get_statistics()["expirations"] == 1
+
+    def test_stalled_call_is_repeated(self):
+        storage = LRUCache(max_size=2, ttl=60)
+        release = threading.Event()
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            stalled = executor.submit(
+                storage.call_once, "a", lambda: release.wait() and "first"
+            )
+            while not storage._in_flight:  # noqa: SLF001
+                time.sleep(0.01)
+            with mock.patch("mopidy_beets.cache.CALL_WAIT_TIMEOUT", 0.01):
+                assert storage.call_once("a", lambda: "second") == "second"
+            release.set()
+            assert stalled.result() == "first"
+
+
+class CacheDecoratorTest(unittest.TestCase):
+    def test_cached_per_key(self):
+        api = CachedApi()
+        assert api.get_value("a") == "value-a-1"
+        assert api.get_value("a") == "value-a-1"
+        assert api.get_value("b") == "value-b-2"
+        assert api.calls == ["a", "b"]
+
+    def test_keyword_arguments(self):
+        api = CachedApi()
+        api.get_value("a")
+        assert api.get_value(key="a") == "value-a-1"
+        assert api.get_page("a") == api.get_page("a", offset=0) == ("a", 0)
+        assert api.get_page("a", offset=3) == ("a", 3)
+        assert api.page_calls == [("a", 0), ("a", 3)]
+
+    def test_unhashable_arguments_are_frozen(self):
+        api = CachedApi()
+        api.get_value([("album_id", 1)])
+        api.get_value([("album_id", 1)])
+        assert len(api.calls) == 1
+
+    def test_statistics_per_method(self):
+        api = CachedApi()
+        api.get_value("a")
+        api.get_value("a")
+        statistics = api.caches.get_statistics()
+        assert statistics["get_value"]["hits"] == 1
+        assert statistics["get_value"]["misses"] == 1
+
+    def test_expired_value_on_failure(self):
+        api = CachedApi()
+        with mock.patch("time.monotonic", return_value=100):
+            api.get_value("a")
+        api.failing = True
+        with mock.patch("time.monotonic", return_value=200):
+            assert api.get_value("a") == "value-a-1"
+            with pytest.raises(BeetsRequestError):
+                api.get_value("b")
+        assert api.calls == ["a", "a", "b"]
+
+    def test_fallback_is_not_cached(self):
+        api = CachedApi()
+        assert api.get_list() == []
+        assert api.caches.get_statistics()["get_list"]["size"] == 0
+
+    def test_stale_while_revalidate(self):
+        api = CachedApi(stale_while_revalidate=True)
+        with mock.patch("mopidy_beets.cache.time.monotonic", return_value=100):
+            api.get_value("a")
+        with mock.patch("mopidy_beets.cache.time.monotonic", return_value=200):
+            assert api.get_value("a") == "value-a-1"
+            api.caches.stop()
+            # the refresh happened in the background
+            assert api.get_value("a") == "value-a-2"
+
+    def get_concurrently(self, api, callers):
+        api.gate.clear()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=callers) as executor:
+            futures = [executor.submit(api.get_value, "a") for _ in range(callers)]
+            # wait until all other callers wait for the first one
+            while api.caches.get_statistics()["get_value"]["coalesced"] < callers - 1:
+                time.sleep(0.01)
+            api.gate.set()
+            return [future.exception() or future.result() for future in futures]
+
+    def test_concurrent_calls_are_coalesced(self):
+        api = CachedApi()
+        assert self.get_concurrently(api, 4) == ["value-a-1"] * 4
+        assert api.calls == ["a"]
+
+    def test_concurrent_calls_share_failures(self):
+        api = CachedApi()
+        api.failing = True
+        results = self.get_concurrently(api, 3)
+        assert all(isinstance(result, BeetsRequestError) for result in results)
+        assert api.calls == ["a"]
+        # the failure is not remembered
+        api.failing = False
+        assert api.get_value("a") == "value-a-2"
@@ -0,0 +1,111 @@
+import concurrent.futures
+import http.server
+import threading
+import time
+import unittest
+from http import HTTPStatus
+from unittest import mock
+
+from mopidy_beets.client import BeetsRemoteClient
+
+
+class FlakyRequestHandler(http.server.BaseHTTPRequestHandler):
+    """fail with "503 Service Unavailable" every second time"""
+
+    requests_count = 0
+    # number of seconds before a response is sent
+    delay = 0
+
+    def do_GET(self):
+        type(self).requests_count += 1
+        time.sleep(self.delay)
+        if self.requests_count % 2:
+            self.send_response(HTTPStatus.SERVICE_UNAVAILABLE)
+            self.end_headers()
+            return
+        body = b'{"artist_names": []}'
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TransportTest(unittest.TestCase):
+    def setUp(self):
+        FlakyRequestHandler.requests_count = 0
+        FlakyRequestHandler.delay = 0
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), FlakyRequestHandler
+        )
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address[:2]
+        self.endpoint = f"http://{host}:{port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_client(self, **kwargs):
+        return BeetsRemoteClient(self.endpoint, {}, **kwargs)
+
+    def test_session(self):
+        client = self.get_client(pool_size=2, max_concurrent_requests=3)
+        adapter = client.api.get_adapter(self.endpoint)
+        assert adapter._pool_maxsize == 3  # noqa: SLF001, PLR2004
+        assert adapter.max_retries.total == 2  # noqa: PLR2004
+        assert client.api.headers["accept-encoding"] == "gzip"
+        client = self.get_client(compression=False)
+        assert client.api.headers["accept-encoding"] == "identity"
+
+    def test_retry(self):
+        client = self.get_client(retry_backoff=0)
+        assert client.get_artists() == []
+        assert FlakyRequestHandler.requests_count == 2  # noqa: PLR2004
+        assert not client.circuit_breaker._failures  # noqa: SLF001
+
+    def test_read_timeout_is_not_repeated(self):
+        FlakyRequestHandler.delay = 0.5
+        client = self.get_client(read_timeout=0.1, retry_backoff=0)
+        assert client.get_artists() == []
+        assert FlakyRequestHandler.requests_count == 1
+        assert client.circuit_breaker._failures == 1  # noqa: SLF001
+
+    def test_without_retry(self):
+        client = self.get_client(max_retries=0)
+        assert client.get_artists() == []
+        assert FlakyRequestHandler.requests_count == 1
+        assert client.circuit_breaker._failures == 1  # noqa: SLF001
+
+
+class CoalescedRequestsTest(unittest.TestCase):
+    def test_workers_do_not_wait_for_queued_requests(self):
+        client = BeetsRemoteClient("http://127.0.0.1:1", {}, max_concurrent_requests=2)
+        self.addCleanup(client.stop)
+        storage = client.caches.get_cache("get_album")
+        workers_busy = threading.Barrier(3)
+        album_requested = threading.Event()
+
+        def lookup_in_worker(_):
+            workers_busy.wait()
+            album_requested.wait()
+            return client.get_albums_by_ids([5])[5].name
+
+        album = {"id": 5, "album": "Foo", "albumartist": "Bar"}
+        with (
+            mock.patch.object(client, "_get", return_value=album),
+            concurrent.futures.ThreadPoolExecutor(2) as executor,
+        ):
+            # both workers are busy, thus the request is queued
+            workers = executor.submit(client.map_concurrently, lookup_in_worker, [1, 2])
+            workers_busy.wait()
+            owner = executor.submit(client.get_albums_by_ids, [5])
+            while not storage._in_flight:  # noqa: SLF001
+                time.sleep(0.01)
+            # the workers use the same album as the queued request
+            album_requested.set()
+            assert workers.result(timeout=5) == ["Foo", "Foo"]
+            assert owner.result(timeout=5)[5].name == "Foo"
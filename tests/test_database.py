@@ -0,0 +1,103 @@
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+
+from mopidy_beets.client import BeetsRemoteClient
+from mopidy_beets.database import BeetsDatabaseClient
+from mopidy_beets.playback import LocalFileMapper
+from mopidy_beets.resilience import BeetsRequestError
+
+from .helper_beets import BeetsAlbum, BeetsAPILibraryTest, BeetsTrack
+
+
+class DatabaseTest(BeetsAPILibraryTest):
+    BEETS_ALBUMS: ClassVar[list[BeetsAlbum]] = [
+        BeetsAlbum(
+            "Album-Title-1",
+            "Album-Artist-1",
+            [BeetsTrack("Title-1"), BeetsTrack("Title-2", "Track-Artist")],
+            "Genre-1",
+            2012,
+        ),
+        BeetsAlbum("Album-Title-2", "Album-Artist-2", [BeetsTrack("Title-3")]),
+    ]
+
+    def get_config(self):
+        config = super().get_config()
+        config["beets"]["library_db"] = self.beets.lib.path.decode()
+        return config
+
+    def test_browse_without_beets_server(self):
+        self.beets.stop()
+        response = self.backend.library.browse("beets:library:albums-by-artist")
+        assert [item.name for item in response] == ["Album-Artist-1", "Album-Artist-2"]
+        album_uri = self.backend.library.browse(response[0].uri)[0].uri
+        tracks = self.backend.library.browse(album_uri)
+        assert [track.name for track in tracks] == ["Title-1", "Title-2"]
+
+    def test_search_and_lookup(self):
+        self.beets.stop()
+        response = self.backend.library.search({"any": ["title-3"]})
+        assert [track.name for track in response.tracks] == ["Title-3"]
+        (track,) = response.tracks
+        assert track.album.name == "Album-Title-2"
+        assert self.backend.library.lookup(track.uri) == [track]
+        assert self.backend.library.get_distinct(
+            "track_name", {"albumartist": ["Album-Artist-1"]}
+        ) == {"Title-1", "Title-2"}
+
+    def test_same_datasets_as_web_api(self):
+        item = self.beets.lib.items("title:Title-1").get()
+        item.mood = "happy"
+        item.store()
+        api = self.backend.beets_api
+        (remote_dataset,) = BeetsRemoteClient.get_remote_datasets_by_ids(
+            api, "/item", "items", [item.id]
+        )
+        (local_dataset,) = api.get_datasets_by_ids("/item", "items", [item.id])
+        assert local_dataset["mood"] == "happy"
+        # the size of the file is not stored in the database and the path of
+        # the album art (inherited from the album) is a local path
+        del remote_dataset["size"]
+        remote_dataset.pop("artpath", None)
+        assert local_dataset == remote_dataset
+
+    def test_same_artists_as_web_api(self):
+        api = self.backend.beets_api
+        remote_artists = BeetsRemoteClient.get_artists.__wrapped__(api)
+        assert remote_artists == ["Album-Artist-1", "Album-Artist-2"]
+        self.beets.stop()
+        assert api.get_artists() == remote_artists
+
+    def test_database_is_read_only(self):
+        database = self.backend.beets_api.database
+        assert database.get_ids("items") == {item.id for item in self.beets.lib.items()}
+        with self.assertRaises(Exception):  # noqa: PT027, B017
+            database._connection.execute("DELETE FROM items")  # noqa: SLF001
+
+    def test_database_errors(self):
+        api = self.backend.beets_api
+        self.beets.stop()
+        # e.g. a locked database or an unknown schema
+        api.database.close()
+        with pytest.raises(BeetsRequestError):
+            api.get_ids("/item")
+        assert api.get_artists() == []
+        assert self.backend.library.search({"any": ["title"]}).tracks == ()
+        assert api.get_track_path(1) is None
+
+    def test_missing_database(self):
+        path = Path(self.beets.lib.path.decode()).with_name("missing.db")
+        api = BeetsDatabaseClient(path, "http://127.0.0.1:1", {})
+        assert api.database is None
+        with pytest.raises(BeetsRequestError):
+            api.get_ids("/item")
+        api.stop()
+
+    def test_local_playback(self):
+        self.backend.playback.file_mapper = LocalFileMapper()
+        self.beets.stop()
+        item = self.beets.lib.items("title:Title-3").get()
+        uri = self.backend.playback.translate_uri(f"beets:library:track;{item.id}")
+        assert uri == Path(item.path.decode()).as_uri()
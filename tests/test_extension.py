@@ -16,6 +16,7 @@ class ExtensionTest(MopidyBeetsTest):
         assert "enabled = true" in config
         assert "hostname = 127.0.0.1" in config
         assert "port = 8337" in config
+        assert "cache_size = 4096" in config
 
     def test_get_config_schema(self):
         ext = Extension()
@@ -25,6 +26,9 @@ class ExtensionTest(MopidyBeetsTest):
         assert "enabled" in schema
         assert "hostname" in schema
         assert "port" in schema
+        assert "cache_size" in schema
+        assert "cache_ttl" in schema
+        assert "mirror" in schema
 
     def test_get_backend_classes(self):
         registry = mock.Mock()
@@ -0,0 +1,39 @@
+import unittest
+
+from mopidy_beets.matching import filter_exact_matches
+
+ITEMS = [
+    {"id": 1, "title": "Foo", "artist": "Bar", "year": 2012, "artists": []},
+    {"id": 2, "title": "Foo Bar", "artist": "Bar", "year": 2012, "artists": []},
+    {"id": 3, "title": "Foo", "artist": "Baz", "year": 2013, "artists": ["Baz"]},
+]
+
+
+def filter_ids(items, exact_query_list):
+    return [item["id"] for item in filter_exact_matches(items, exact_query_list)]
+
+
+class FilterExactMatchesTest(unittest.TestCase):
+    def test_text_fields(self):
+        assert filter_ids(ITEMS, [("title", "Foo")]) == [1, 3]
+        assert filter_ids(ITEMS, [("title", "Foo"), ("artist", "Bar")]) == [1]
+        assert filter_ids(ITEMS, [("title", "Foo"), ("title", "Bar")]) == []
+
+    def test_other_fields_are_not_filtered(self):
+        assert filter_ids(ITEMS, [("year", 2011)]) == [1, 2, 3]
+
+    def test_terms(self):
+        assert filter_ids(ITEMS, [(None, "Foo")]) == [1, 3]
+        assert filter_ids(ITEMS, [(None, "Foo"), (None, "Bar")]) == [1]
+        # many terms are looked up in a set of the text attributes
+        assert (
+            filter_ids(ITEMS, [(None, "Foo"), (None, "Baz"), (None, "Baz"), (None, "")])
+            == []
+        )
+        assert filter_ids(
+            [{**item, "genre": "", "comments": "Foo"} for item in ITEMS],
+            [(None, "Foo"), (None, "Bar"), (None, ""), ("year", 2012)],
+        ) == [1, 2]
+
+    def test_iterator(self):
+        assert filter_ids(iter(ITEMS), [(None, "Baz")]) == [3]
@@ -0,0 +1,80 @@
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+from mopidy_beets.metrics import (
+    MetricsReporter,
+    RequestMetrics,
+    format_prometheus,
+    get_endpoint_pattern,
+)
+
+CACHE_STATISTICS = {
+    "get_track": {
+        "size": 3,
+        "max_size": 10,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 0,
+        "expirations": 0,
+    },
+}
+
+
+class RequestMetricsTest(unittest.TestCase):
+    def test_endpoint_pattern(self):
+        assert get_endpoint_pattern("/item/query/artist:Foo/track+") == "/item/query"
+        assert get_endpoint_pattern("/album/values/genre?sort_key=genre") == (
+            "/album/values"
+        )
+        assert get_endpoint_pattern("/album/1,2,3") == "/album/{id}"
+        assert get_endpoint_pattern("/album/12/art") == "/album/{id}/art"
+        assert get_endpoint_pattern("/artist/") == "/artist"
+
+    def test_statistics(self):
+        metrics = RequestMetrics()
+        metrics.record_request("/item/1", 0.02)
+        metrics.record_request("/item/2,3", 20, failed=True)
+        metrics.record_received("/item/1", 100)
+        metrics.record_parsing("/item/1", 0.5)
+        statistics = metrics.get_statistics()["/item/{id}"]
+        assert statistics["requests"] == 2  # noqa: PLR2004
+        assert statistics["failures"] == 1
+        assert statistics["bytes"] == 100  # noqa: PLR2004
+        assert statistics["parse_seconds"] == 0.5  # noqa: PLR2004
+        assert statistics["latency_buckets"][0.01] == 0
+        assert statistics["latency_buckets"][0.025] == 1
+        assert statistics["latency_buckets"][10] == 1
+        assert statistics["latency_buckets"][math.inf] == 2  # noqa: PLR2004
+
+    def test_prometheus(self):
+        metrics = RequestMetrics()
+        metrics.record_request("/item/query/foo", 0.2)
+        text = format_prometheus(metrics.get_statistics(), CACHE_STATISTICS)
+        lines = text.splitlines()
+        assert "# TYPE mopidy_beets_request_duration_seconds histogram" in lines
+        assert (
+            'mopidy_beets_request_duration_seconds_bucket{endpoint="/item/query",'
+            'le="0.1"} 0'
+        ) in lines
+        assert (
+            'mopidy_beets_request_duration_seconds_bucket{endpoint="/item/query",'
+            'le="+Inf"} 1'
+        ) in lines
+        assert 'mopidy_beets_requests_total{endpoint="/item/query"} 1' in lines
+        assert 'mopidy_beets_cache_hit_ratio{cache="get_track"} 0.75' in lines
+
+    def test_reporter_writes_file(self):
+        metrics = RequestMetrics()
+        metrics.record_request("/artist/", 0.1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "beets.prom"
+            reporter = MetricsReporter(
+                lambda: (metrics.get_statistics(), CACHE_STATISTICS), 60, path
+            )
+            reporter.report()
+            assert 'mopidy_beets_requests_total{endpoint="/artist"} 1' in (
+                path.read_text().splitlines()
+            )
+            assert [entry.name for entry in Path(directory).iterdir()] == ["beets.prom"]
@@ -0,0 +1,117 @@
+import tempfile
+import time
+from typing import ClassVar
+from unittest import mock
+
+from .helper_beets import BeetsAlbum, BeetsAPILibraryTest, BeetsTrack
+
+
+class MirrorTest(BeetsAPILibraryTest):
+    BEETS_ALBUMS: ClassVar[list[BeetsAlbum]] = [
+        BeetsAlbum(
+            "Album-Title-1",
+            "Album-Artist-1",
+            [BeetsTrack("Title-1"), BeetsTrack("Title-2")],
+            "Genre-1",
+            2012,
+        ),
+        BeetsAlbum("Album-Title-2", "Album-Artist-2", [BeetsTrack("Title-3")]),
+    ]
+
+    def setUp(self):
+        self._data_directory = tempfile.TemporaryDirectory()
+        super().setUp()
+        self.backend.beets_api.refresh()
+
+    def tearDown(self):
+        super().tearDown()
+        self._data_directory.cleanup()
+
+    def get_config(self):
+        config = super().get_config()
+        config["beets"]["mirror"] = True
+        config["core"] = {"data_dir": self._data_directory.name}
+        return config
+
+    def test_browse_without_beets_server(self):
+        self.beets.stop()
+        response = self.backend.library.browse("beets:library:albums-by-artist")
+        assert [item.name for item in response] == ["Album-Artist-1", "Album-Artist-2"]
+        album_uri = self.backend.library.browse(response[0].uri)[0].uri
+        tracks = self.backend.library.browse(album_uri)
+        assert [track.name for track in tracks] == ["Title-1", "Title-2"]
+
+    def test_browse_albums_by_year(self):
+        self.beets.stop()
+        response = self.backend.library.browse("beets:library:albums-by-year;2012")
+        assert [item.name for item in response] == ["Album-Artist-1 - Album-Title-1"]
+
+    def test_search(self):
+        self.beets.stop()
+        response = self.backend.library.search({"any": ["title-3"]})
+        assert [track.name for track in response.tracks] == ["Title-3"]
+        assert response.tracks[0].album.name == "Album-Title-2"
+
+    def test_incremental_refresh(self):
+        item = self.beets.lib.items("title:Title-3").get()
+        item.title = "Title-4"
+        # beets updates the modification time after writing the file
+        item.mtime = time.time()
+        item.store()
+        removed_item = self.beets.lib.items("title:Title-1").get()
+        removed_item.remove()
+        self.backend.beets_api.refresh()
+        response = self.backend.library.search({"any": ["title"]})
+        received_titles = sorted(track.name for track in response.tracks)
+        assert received_titles == ["Title-2", "Title-4"]
+
+    def test_incremental_refresh_with_time_zone_offset(self):
+        previous_item = self.beets.lib.items("title:Title-1").get()
+        previous_item.mtime = time.time() - 60
+        previous_item.store()
+        self.backend.beets_api.refresh()
+        item = self.beets.lib.items("title:Title-3").get()
+        item.title = "Title-4"
+        item.mtime = time.time()
+        item.store()
+        # the local time of the Mopidy host is ahead of the beets server
+        localtime = time.localtime
+        with mock.patch(
+            "mopidy_beets.client.time.localtime",
+            side_effect=lambda seconds: localtime(seconds + 3 * 60 * 60),
+        ):
+            self.backend.beets_api.refresh()
+        response = self.backend.library.search({"any": ["title-4"]})
+        assert [track.name for track in response.tracks] == ["Title-4"]
+
+    def test_modified_items_are_queried_in_server_time(self):
+        api = self.backend.beets_api
+        now = time.time()
+        old_item = self.beets.lib.items("title:Title-1").get()
+        old_item.mtime = now - 60 * 60
+        old_item.store()
+        recent_item = self.beets.lib.items("title:Title-2").get()
+        recent_item.mtime = now
+        recent_item.store()
+
+        def get_modified_ids():
+            datasets = api.get_datasets_modified_since("/item", "mtime", now - 60)
+            return {dataset["id"] for dataset in datasets}
+
+        # the UTC offset of the server is not known yet: a wide margin is used
+        assert {old_item.id, recent_item.id} <= get_modified_ids()
+        # the offset is determined via the latest item
+        assert recent_item.id in get_modified_ids()
+        assert old_item.id not in get_modified_ids()
+
+    def test_lookup_many(self):
+        self.beets.stop()
+        artist_uris = [
+            "beets:library:artist;Album-Artist-2",
+            "beets:library:artist;Album-Artist-1",
+        ]
+        response = self.backend.library.lookup(uris=artist_uris)
+        received_titles = [
+            [track.name for track in response[uri]] for uri in artist_uris
+        ]
+        assert received_titles == [["Title-3"], ["Title-1", "Title-2"]]
@@ -0,0 +1,83 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import ClassVar
+
+from mopidy_beets.playback import LocalFileMapper
+
+from . import MopidyBeetsTest
+from .helper_beets import BeetsAlbum, BeetsAPILibraryTest, BeetsTrack
+
+
+class LocalFileMapperTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        (self.directory / "Artist").mkdir()
+        self.file = self.directory / "Artist" / "track.mp3"
+        self.file.write_bytes(b"")
+
+    def test_same_host(self):
+        mapper = LocalFileMapper()
+        assert mapper.get_file_uri(str(self.file)) == self.file.as_uri()
+        assert mapper.get_file_uri(str(self.directory / "missing.mp3")) is None
+        assert mapper.get_file_uri(None) is None
+
+    def test_mapped_directory(self):
+        mapper = LocalFileMapper("/srv/music", self.directory)
+        uri = mapper.get_file_uri("/srv/music/Artist/track.mp3")
+        assert uri == self.file.as_uri()
+        assert mapper.get_file_uri("/srv/other/Artist/track.mp3") is None
+        assert mapper.get_file_uri(str(self.file)) is None
+
+    def test_incomplete_mapping(self):
+        with self.assertRaises(ValueError):  # noqa: PT027
+            LocalFileMapper("/srv/music", None)
+
+
+class IncompleteMappingTest(MopidyBeetsTest):
+    @staticmethod
+    def get_config():
+        config = MopidyBeetsTest.get_config()
+        config["beets"]["local_playback"] = True
+        config["beets"]["beets_music_directory"] = "/srv/music"
+        return config
+
+    def test_local_playback_is_disabled(self):
+        assert self.backend.playback.file_mapper is None
+
+
+class LocalPlaybackTest(BeetsAPILibraryTest):
+    BEETS_ALBUMS: ClassVar[list[BeetsAlbum]] = [
+        BeetsAlbum("Album-Title-1", "Album-Artist-1", [BeetsTrack("Title-1")]),
+    ]
+
+    def get_config(self):
+        config = super().get_config()
+        config["beets"]["local_playback"] = True
+        return config
+
+    def setUp(self):
+        super().setUp()
+        self.beets._app.config["INCLUDE_PATHS"] = True  # noqa: SLF001
+        self.addCleanup(self.beets._app.config.pop, "INCLUDE_PATHS")  # noqa: SLF001
+        item = self.beets.lib.items().get()
+        self.track_uri = f"beets:library:track;{item.id}"
+        self.path = Path(item.path.decode())
+        self.stream_url = self.backend.beets_api.get_track_stream_url(str(item.id))
+
+    def test_local_file(self):
+        playback = self.backend.playback
+        assert playback.translate_uri(self.track_uri) == self.path.as_uri()
+        # the path is cached: no request is necessary anymore
+        self.beets.stop()
+        assert playback.translate_uri(self.track_uri) == self.path.as_uri()
+
+    def test_missing_file_is_streamed(self):
+        self.path.unlink()
+        assert self.backend.playback.translate_uri(self.track_uri) == self.stream_url
+
+    def test_paths_not_delivered(self):
+        self.beets._app.config["INCLUDE_PATHS"] = False  # noqa: SLF001
+        assert self.backend.playback.translate_uri(self.track_uri) == self.stream_url
@@ -0,0 +1,38 @@
+import unittest
+from unittest import mock
+
+from mopidy_beets.resilience import CircuitBreaker
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_open_after_consecutive_failures(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.is_open()
+        assert not breaker.allow_request()
+
+    def test_single_trial_after_timeout(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+        with mock.patch("time.monotonic", return_value=100):
+            breaker.record_failure()
+        with mock.patch("time.monotonic", return_value=131):
+            assert breaker.allow_request()
+            # only one trial request at a time
+            assert not breaker.allow_request()
+            breaker.record_failure()
+            assert not breaker.allow_request()
+        with mock.patch("time.monotonic", return_value=162):
+            assert breaker.allow_request()
+            breaker.record_success()
+        assert not breaker.is_open()
+        assert breaker.allow_request()
+
+    def test_disabled(self):
+        breaker = CircuitBreaker(threshold=0)
+        for _ in range(10):
+            breaker.record_failure()
+        assert breaker.allow_request()
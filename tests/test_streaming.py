@@ -0,0 +1,53 @@
+import json
+import unittest
+
+import pytest
+
+from mopidy_beets.streaming import iterate_json_array
+
+DOCUMENT = {
+    "results": [
+        {"id": 1, "title": "Fünf, Sechs ] {"},
+        {"id": 2, "title": 'with "quotes"', "values": [1, 2, [3]]},
+        {"id": 3, "title": ""},
+    ]
+}
+
+
+def split_into_chunks(data, size):
+    return [data[index : index + size] for index in range(0, len(data), size)]
+
+
+class IterateJsonArrayTest(unittest.TestCase):
+    def test_arbitrary_chunk_sizes(self):
+        for indent in (None, 2):
+            data = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False).encode()
+            for size in (1, 2, 7, len(data)):
+                chunks = split_into_chunks(data, size)
+                assert (
+                    list(iterate_json_array(chunks, "results")) == (DOCUMENT["results"])
+                )
+
+    def test_empty_array(self):
+        assert list(iterate_json_array([b'{"results": [', b"]}"], "results")) == []
+
+    def test_elements_are_delivered_before_the_end(self):
+        chunks = iter([b'{"results": [{"id": 1},', b'{"id": 2}'])
+        elements = iterate_json_array(chunks, "results")
+        assert next(elements) == {"id": 1}
+        assert next(elements) == {"id": 2}
+        with pytest.raises(ValueError, match="Incomplete"):
+            next(elements)
+
+    def test_missing_array(self):
+        with pytest.raises(ValueError, match="Missing"):
+            list(iterate_json_array([b'{"values": []}'], "results"))
+
+    def test_invalid_data(self):
+        chunks = iter([b'{"results": [{"id": 1}, {"id": ', b"x" * 10, b"x" * 10])
+        elements = iterate_json_array(chunks, "results", max_buffer_size=15)
+        assert next(elements) == {"id": 1}
+        with pytest.raises(ValueError, match="Invalid"):
+            next(elements)
+        # the remaining data is not received anymore
+        assert next(chunks) == b"x" * 10
@@ -0,0 +1,62 @@
+import unittest
+
+from mopidy import models
+
+from mopidy_beets.translator import (
+    AlbumSummary,
+    parse_album_summary,
+    parse_track,
+    parse_track_ref,
+)
+
+TRACK_DATA = {
+    "id": 7,
+    "title": "Title-1",
+    "artist": "Artist-1",
+    "artist_sort": "Artist, The",
+    "composer": "Composer-1",
+    "album_id": 3,
+    "track": 2,
+    "length": 12.5,
+    "bitrate": 128000,
+    "year": 2012,
+}
+
+
+class ParseTrackTest(unittest.TestCase):
+    def test_attributes(self):
+        track = parse_track(TRACK_DATA, None, albums={})
+        assert track.uri == "beets:library:track;7"
+        assert track.name == "Title-1"
+        assert track.track_no == TRACK_DATA["track"]
+        assert track.length == 12500  # noqa: PLR2004
+        assert track.bitrate == 128  # noqa: PLR2004
+        assert track.date == "2012"
+        assert track.album is None
+        (artist,) = track.artists
+        assert artist.uri == "beets:library:artist;Artist-1"
+        assert artist.sortname == "Artist, The"
+        (composer,) = track.composers
+        assert composer.name == "Composer-1"
+
+    def test_known_artists_are_reused(self):
+        known_artists = {}
+        first = parse_track(TRACK_DATA, None, albums={}, known_artists=known_artists)
+        second = parse_track(
+            {**TRACK_DATA, "id": 8}, None, albums={}, known_artists=known_artists
+        )
+        assert next(iter(first.artists)) is next(iter(second.artists))
+        assert len(known_artists) == 2  # noqa: PLR2004
+
+
+class ParseRefTest(unittest.TestCase):
+    def test_track_ref(self):
+        assert parse_track_ref(TRACK_DATA) == models.Ref.track(
+            uri="beets:library:track;7", name="Title-1"
+        )
+
+    def test_album_summary(self):
+        album_data = {"id": 3, "album": "Foo", "albumartist": "", "year": 2012}
+        assert parse_album_summary(album_data) == AlbumSummary(
+            uri="beets:library:album;3", name="Foo", artist=None, date="2012"
+        )